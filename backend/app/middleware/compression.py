@@ -28,6 +28,10 @@ except ImportError:
 
 logger = logging.getLogger(__name__)
 
+# Errors the compressors raise on bad input or settings; anything else is a bug
+# and should propagate rather than be swallowed on the response path
+COMPRESSION_ERRORS = (ValueError, OSError, zlib.error) + ((brotli.error,) if BROTLI_AVAILABLE else ())
+
 class CompressionConfig:
     """Configuration for compression middleware"""
     
@@ -234,7 +238,7 @@ class ResponseCompressor:
             
             return compressed_content
             
-        except Exception as e:
+        except COMPRESSION_ERRORS as e:
             logger.error(f"Compression failed with {encoding}: {e}")
             self.stats.record_request()
             return content
@@ -289,7 +293,7 @@ class CompressionMiddleware:
             try:
                 if hasattr(response, '__iter__'):
                     content = b"".join([chunk for chunk in response])
-            except Exception:
+            except TypeError:
                 self.compressor.stats.record_request()
                 return response
         
@@ -311,7 +315,8 @@ class CompressionMiddleware:
                     data = json.loads(content.decode('utf-8'))
                     content = self.json_optimizer.optimize_json_response(data)
                     content_length = len(content)
-                except Exception as e:
+                except (ValueError, TypeError) as e:
+                    # Undecodable/invalid JSON (UnicodeDecodeError, JSONDecodeError) or unserializable data
                     logger.debug(f"JSON optimization failed: {e}")
             
             # Compress content
@@ -338,7 +343,7 @@ class CompressionMiddleware:
             
             return compressed_response
             
-        except Exception as e:
+        except (ValueError, TypeError) as e:
             logger.error(f"Response compression failed: {e}")
             self.compressor.stats.record_request()
             return response
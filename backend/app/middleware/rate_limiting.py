@@ -13,7 +13,7 @@ redis_url = os.getenv("REDIS_URL", "redis://localhost:6379")
 try:
     redis_client = redis.from_url(redis_url, decode_responses=True)
     redis_available = True
-except:
+except (ValueError, redis.RedisError):
     redis_client = None
     redis_available = False
 
@@ -88,8 +88,8 @@ class CustomRateLimiter:
                 "limit": max_requests
             }
             
-        except Exception:
-            # Fall back to memory store
+        except redis.RedisError:
+            # Redis unreachable or erroring: fall back to memory store
             return self._check_memory_limit(identifier, endpoint_type, window_start, current_time, max_requests)
     
     def _check_memory_limit(self, identifier: str, endpoint_type: str, window_start: float, current_time: float, max_requests: int) -> Tuple[bool, Dict]:
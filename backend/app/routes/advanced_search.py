@@ -2,10 +2,11 @@
 Advanced search routes with optimized indexing, hybrid search, and analytics.
 """
 
-from fastapi import APIRouter, HTTPException, UploadFile, File, Depends, Query
-from typing import List, Optional, Dict, Any
+from fastapi import APIRouter, HTTPException, UploadFile, File, Depends, Query, Body, Response
+from typing import List, Optional, Dict, Any, Tuple
 import logging
 import asyncio
+import time
 from datetime import datetime
 
 from app.models.schemas import (
@@ -17,20 +18,100 @@ from app.services.optimized_search_service import (
 )
 
 logger = logging.getLogger(__name__)
+
 router = APIRouter(prefix="/search/advanced", tags=["Advanced Search"])
 
-# Global service instance
+# Global service instance (published only once its indexes are set up)
 search_service = None
+_search_service_lock = asyncio.Lock()
+
+# Batch hybrid search: queries per request, and how many of them run at once
+# (each one is a CLIP encode plus a vector search)
+MAX_BATCH_QUERIES = 20
+BATCH_SEARCH_CONCURRENCY = 4
+
+# Facet endpoints (categories, brands, price ranges) change rarely; cache them briefly
+FACET_CACHE_TTL_SECONDS = 300
+_facet_cache: Dict[str, Tuple[float, Any]] = {}
+
+def _get_cached_facet(key: str) -> Optional[Any]:
+    """Return a cached facet value if it has not expired"""
+    entry = _facet_cache.get(key)
+    if entry is not None and entry[0] > time.monotonic():
+        return entry[1]
+    return None
+
+def _set_cached_facet(key: str, value: Any) -> None:
+    """Cache a facet value for FACET_CACHE_TTL_SECONDS"""
+    _facet_cache[key] = (time.monotonic() + FACET_CACHE_TTL_SECONDS, value)
+
+def _set_facet_cache_headers(response: Response) -> None:
+    """Let clients reuse facet responses for the same TTL as the server cache"""
+    response.headers["Cache-Control"] = f"public, max-age={FACET_CACHE_TTL_SECONDS}"
 
 async def get_search_service() -> OptimizedSearchService:
     """Dependency to get the search service instance"""
     global search_service
     if search_service is None:
-        search_service = OptimizedSearchService()
-        # Setup indexes on first use
-        await search_service.setup_optimized_indexes()
+        async with _search_service_lock:
+            # Concurrent first requests wait here for a single build; a failed
+            # setup leaves the global unset so the next request retries
+            if search_service is None:
+                service = OptimizedSearchService()
+                await service.setup_optimized_indexes()
+                search_service = service
     return search_service
 
+async def _run_hybrid_search(
+    request: HybridSearchRequest,
+    service: OptimizedSearchService
+) -> SearchResponse:
+    """Build filter/ranking config for a hybrid request and execute it"""
+    # Build search filter
+    search_filter = SearchFilter(
+        categories=request.categories,
+        brands=request.brands,
+        min_price=request.min_price,
+        max_price=request.max_price,
+        min_rating=request.min_rating,
+        in_stock=request.in_stock
+    )
+    
+    # Build ranking config
+    ranking_config = RankingConfig()
+    if request.ranking_factors:
+        # Map string keys to enum values
+        factor_mapping = {
+            "similarity": RankingFactor.SIMILARITY,
+            "price": RankingFactor.PRICE,
+            "popularity": RankingFactor.POPULARITY,
+            "recency": RankingFactor.RECENCY,
+            "brand_score": RankingFactor.BRAND_SCORE,
+            "category_boost": RankingFactor.CATEGORY_BOOST
+        }
+        
+        for factor_name, weight in request.ranking_factors.items():
+            if factor_name in factor_mapping:
+                ranking_config.factors[factor_mapping[factor_name]] = weight
+    
+    # Perform hybrid search
+    result = await service.hybrid_search(
+        text_query=request.text_query,
+        image_data=None,  # No image in this endpoint
+        search_filter=search_filter,
+        ranking_config=ranking_config,
+        limit=request.limit,
+        offset=request.offset,
+        text_weight=request.text_weight,
+        image_weight=request.image_weight
+    )
+    
+    # Add metadata
+    result.filters_applied = search_filter.__dict__
+    result.search_type = "hybrid_text"
+    
+    return result
+
 @router.post("/hybrid", response_model=SearchResponse)
 async def hybrid_search(
     request: HybridSearchRequest,
@@ -40,50 +121,7 @@ async def hybrid_search(
     Perform hybrid search combining text query with advanced filtering and ranking.
     """
     try:
-        # Build search filter
-        search_filter = SearchFilter(
-            categories=request.categories,
-            brands=request.brands,
-            min_price=request.min_price,
-            max_price=request.max_price,
-            min_rating=request.min_rating,
-            in_stock=request.in_stock
-        )
-        
-        # Build ranking config
-        ranking_config = RankingConfig()
-        if request.ranking_factors:
-            # Map string keys to enum values
-            factor_mapping = {
-                "similarity": RankingFactor.SIMILARITY,
-                "price": RankingFactor.PRICE,
-                "popularity": RankingFactor.POPULARITY,
-                "recency": RankingFactor.RECENCY,
-                "brand_score": RankingFactor.BRAND_SCORE,
-                "category_boost": RankingFactor.CATEGORY_BOOST
-            }
-            
-            for factor_name, weight in request.ranking_factors.items():
-                if factor_name in factor_mapping:
-                    ranking_config.factors[factor_mapping[factor_name]] = weight
-        
-        # Perform hybrid search
-        result = await service.hybrid_search(
-            text_query=request.text_query,
-            image_data=None,  # No image in this endpoint
-            search_filter=search_filter,
-            ranking_config=ranking_config,
-            limit=request.limit,
-            offset=request.offset,
-            text_weight=request.text_weight,
-            image_weight=request.image_weight
-        )
-        
-        # Add metadata
-        result.filters_applied = search_filter.__dict__
-        result.search_type = "hybrid_text"
-        
-        return result
+        return await _run_hybrid_search(request, service)
         
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
@@ -91,6 +129,30 @@ async def hybrid_search(
         logger.error(f"Hybrid search failed: {e}")
         raise HTTPException(status_code=500, detail="Search failed")
 
+@router.post("/hybrid/batch", response_model=List[Optional[SearchResponse]])
+async def hybrid_search_batch(
+    queries: List[HybridSearchRequest] = Body(..., embed=True, max_length=MAX_BATCH_QUERIES),
+    service: OptimizedSearchService = Depends(get_search_service)
+):
+    """
+    Perform several hybrid searches in a single request (at most MAX_BATCH_QUERIES).
+    Queries run concurrently, at most BATCH_SEARCH_CONCURRENCY at a time, so a batch
+    costs one round trip instead of one per query.
+    Results are returned in the same order as the submitted queries; a query that
+    fails yields null in its slot instead of failing the whole batch.
+    """
+    semaphore = asyncio.Semaphore(BATCH_SEARCH_CONCURRENCY)
+    
+    async def run_query(query: HybridSearchRequest) -> Optional[SearchResponse]:
+        async with semaphore:
+            try:
+                return await _run_hybrid_search(query, service)
+            except Exception as e:
+                logger.error(f"Batch hybrid search query failed: {e}")
+                return None
+    
+    return await asyncio.gather(*(run_query(query) for query in queries))
+
 @router.post("/hybrid-with-image", response_model=SearchResponse)
 async def hybrid_search_with_image(
     text_query: Optional[str] = None,
@@ -316,13 +378,19 @@ async def setup_search_indexes(
 
 @router.get("/categories", response_model=List[str])
 async def get_search_categories(
+    response: Response,
     service: OptimizedSearchService = Depends(get_search_service)
 ):
     """
     Get all available product categories for filtering.
     """
     try:
-        categories = await service.vector_service.get_categories()
+        _set_facet_cache_headers(response)
+        
+        categories = _get_cached_facet("categories")
+        if categories is None:
+            categories = await service.vector_service.get_categories()
+            _set_cached_facet("categories", categories)
         return categories
         
     except Exception as e:
@@ -331,6 +399,7 @@ async def get_search_categories(
 
 @router.get("/brands", response_model=List[str])
 async def get_search_brands(
+    response: Response,
     limit: int = Query(50, description="Maximum number of brands to return"),
     service: OptimizedSearchService = Depends(get_search_service)
 ):
@@ -338,6 +407,8 @@ async def get_search_brands(
     Get all available product brands for filtering.
     """
     try:
+        _set_facet_cache_headers(response)
+        
         # This would need to be implemented in vector_service
         # For now, return a placeholder
         brands = [
@@ -354,12 +425,15 @@ async def get_search_brands(
 
 @router.get("/price-ranges", response_model=Dict[str, Any])
 async def get_price_ranges(
+    response: Response,
     service: OptimizedSearchService = Depends(get_search_service)
 ):
     """
     Get price range statistics for the product catalog.
     """
     try:
+        _set_facet_cache_headers(response)
+        
         # This would need to be implemented to get actual price statistics
         # For now, return common price ranges
         return {
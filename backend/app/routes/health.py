@@ -1,4 +1,4 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Response
 from typing import Dict, Any
 import time
 import logging
@@ -19,7 +19,7 @@ except ImportError:
     DATABASE_SERVICE_AVAILABLE = False
 
 try:
-    from app.services.monitoring_service import performance_monitor
+    from app.services.monitoring_service import performance_monitor, CONTENT_TYPE_LATEST
     MONITORING_SERVICE_AVAILABLE = True
 except ImportError:
     MONITORING_SERVICE_AVAILABLE = False
@@ -31,10 +31,23 @@ try:
 except ImportError:
     IMAGE_SERVICE_AVAILABLE = False
 
+# Process handle is created once: Process() re-reads /proc on construction, and
+# cpu_percent() needs a persistent handle to measure against the previous call
+try:
+    import psutil
+    _PROCESS = psutil.Process()
+except ImportError:
+    psutil = None
+    _PROCESS = None
+
 logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
+async def _skipped_check():
+    """Placeholder awaitable for services that are not installed"""
+    return None
+
 @router.get("/health")
 async def health_check():
     """Basic health check endpoint"""
@@ -60,47 +73,50 @@ async def detailed_health_check() -> Dict[str, Any]:
         "errors": []
     }
     
+    # Probe cache, database and monitoring concurrently (the sync monitoring report
+    # runs in a worker thread); results are recorded below in the usual order
+    cache_result, db_result, monitoring_result = await asyncio.gather(
+        cache_service.health_check() if CACHE_SERVICE_AVAILABLE else _skipped_check(),
+        db_manager.health_check_all() if DATABASE_SERVICE_AVAILABLE else _skipped_check(),
+        asyncio.to_thread(performance_monitor.get_health_report) if MONITORING_SERVICE_AVAILABLE else _skipped_check(),
+        return_exceptions=True
+    )
+    
     # Check cache service
     if CACHE_SERVICE_AVAILABLE:
-        try:
-            cache_health = await cache_service.health_check()
-            health_report["services"]["cache"] = cache_health
+        if isinstance(cache_result, BaseException):
+            health_report["services"]["cache"] = {"status": "error", "error": str(cache_result)}
+            health_report["errors"].append(f"Cache health check failed: {cache_result}")
+        else:
+            health_report["services"]["cache"] = cache_result
             
-            if cache_health["status"] != "healthy":
+            if cache_result["status"] != "healthy":
                 health_report["warnings"].append("Cache service is not healthy")
-                
-        except Exception as e:
-            health_report["services"]["cache"] = {"status": "error", "error": str(e)}
-            health_report["errors"].append(f"Cache health check failed: {e}")
     else:
         health_report["services"]["cache"] = {"status": "not_available"}
         health_report["warnings"].append("Cache service not available")
     
     # Check database service
     if DATABASE_SERVICE_AVAILABLE:
-        try:
-            db_health = await db_manager.health_check_all()
-            health_report["services"]["database"] = db_health
+        if isinstance(db_result, BaseException):
+            health_report["services"]["database"] = {"status": "error", "error": str(db_result)}
+            health_report["errors"].append(f"Database health check failed: {db_result}")
+        else:
+            health_report["services"]["database"] = db_result
             
-            if db_health.get("overall_status") != "healthy":
+            if db_result.get("overall_status") != "healthy":
                 health_report["warnings"].append("Database service is not healthy")
-                
-        except Exception as e:
-            health_report["services"]["database"] = {"status": "error", "error": str(e)}
-            health_report["errors"].append(f"Database health check failed: {e}")
     else:
         health_report["services"]["database"] = {"status": "not_available"}
         health_report["warnings"].append("Database service not available")
     
     # Check monitoring service
     if MONITORING_SERVICE_AVAILABLE:
-        try:
-            monitoring_health = performance_monitor.get_health_report()
-            health_report["performance"] = monitoring_health
-            
-        except Exception as e:
-            health_report["performance"] = {"error": str(e)}
-            health_report["errors"].append(f"Monitoring health check failed: {e}")
+        if isinstance(monitoring_result, BaseException):
+            health_report["performance"] = {"error": str(monitoring_result)}
+            health_report["errors"].append(f"Monitoring health check failed: {monitoring_result}")
+        else:
+            health_report["performance"] = monitoring_result
     else:
         health_report["warnings"].append("Monitoring service not available")
     
@@ -121,21 +137,23 @@ async def detailed_health_check() -> Dict[str, Any]:
     
     # Memory check
     try:
-        import psutil
-        process = psutil.Process()
+        if _PROCESS is None:
+            raise RuntimeError("psutil not available")
+        process = _PROCESS
         memory_info = process.memory_info()
+        memory_percent = process.memory_percent()
         
         health_report["services"]["system"] = {
             "status": "healthy",
             "memory_rss_mb": memory_info.rss / 1024 / 1024,
-            "memory_percent": process.memory_percent(),
+            "memory_percent": memory_percent,
             "cpu_percent": process.cpu_percent(),
             "open_files": len(process.open_files()) if hasattr(process, 'open_files') else 0
         }
         
         # Check for memory warnings
-        if process.memory_percent() > 80:
-            health_report["warnings"].append(f"High memory usage: {process.memory_percent():.1f}%")
+        if memory_percent > 80:
+            health_report["warnings"].append(f"High memory usage: {memory_percent:.1f}%")
         
     except Exception as e:
         health_report["services"]["system"] = {"status": "error", "error": str(e)}
@@ -179,8 +197,10 @@ async def database_health():
         raise HTTPException(status_code=503, detail="Database service not available")
     
     try:
-        health = await db_manager.health_check_all()
-        stats = await db_manager.get_all_stats()
+        health, stats = await asyncio.gather(
+            db_manager.health_check_all(),
+            db_manager.get_all_stats()
+        )
         
         return {
             "health": health,
@@ -206,6 +226,17 @@ async def performance_health():
     except Exception as e:
         raise HTTPException(status_code=503, detail=f"Performance health check failed: {e}")
 
+@router.get("/metrics")
+async def prometheus_metrics():
+    """Prometheus scrape endpoint (text exposition format, no JSON encoding)"""
+    if not MONITORING_SERVICE_AVAILABLE:
+        raise HTTPException(status_code=503, detail="Monitoring service not available")
+    
+    return Response(
+        content=performance_monitor.metrics_collector.export_prometheus_metrics(),
+        media_type=CONTENT_TYPE_LATEST
+    )
+
 @router.get("/health/live")
 async def liveness_probe():
     """Kubernetes liveness probe - simple check"""
@@ -217,22 +248,17 @@ async def readiness_probe():
     ready = True
     checks = {}
     
-    # Quick cache check
+    # Quick cache and database checks, run concurrently
+    probes = {}
     if CACHE_SERVICE_AVAILABLE:
-        try:
-            await asyncio.wait_for(cache_service.health_check(), timeout=2.0)
-            checks["cache"] = True
-        except:
-            checks["cache"] = False
-            ready = False
-    
-    # Quick database check
+        probes["cache"] = asyncio.wait_for(cache_service.health_check(), timeout=2.0)
     if DATABASE_SERVICE_AVAILABLE:
-        try:
-            await asyncio.wait_for(db_manager.health_check_all(), timeout=2.0)
-            checks["database"] = True
-        except:
-            checks["database"] = False
+        probes["database"] = asyncio.wait_for(db_manager.health_check_all(), timeout=2.0)
+    
+    results = await asyncio.gather(*probes.values(), return_exceptions=True)
+    for name, result in zip(probes, results):
+        checks[name] = not isinstance(result, BaseException)
+        if not checks[name]:
             ready = False
     
     if ready:
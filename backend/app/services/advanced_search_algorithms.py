@@ -11,14 +11,31 @@ from typing import Dict, List, Optional, Tuple, Any, Union
 from dataclasses import dataclass, field
 from enum import Enum
 from datetime import datetime, timedelta
-import json
-import asyncio
-from collections import defaultdict
+import hashlib
 import math
 import random
+import sys
+
+try:
+    import simsimd
+    SIMSIMD_AVAILABLE = True
+except ImportError:
+    simsimd = None
+    SIMSIMD_AVAILABLE = False
+
+try:
+    import xxhash
+    XXHASH_AVAILABLE = True
+except ImportError:
+    xxhash = None
+    XXHASH_AVAILABLE = False
 
 logger = logging.getLogger(__name__)
 
+# The per-search records drop their instance __dict__ where dataclasses
+# support it (Python 3.10+); on older interpreters they stay plain dataclasses
+_SLOTS = {"slots": True} if sys.version_info >= (3, 10) else {}
+
 class SimilarityMetric(Enum):
     """Types of similarity metrics available"""
     VISUAL = "visual"
@@ -47,7 +64,7 @@ class RankingAlgorithm(Enum):
     GEOGRAPHIC = "geographic"
     EXPERIMENTAL = "experimental"
 
-@dataclass
+@dataclass(**_SLOTS)
 class UserProfile:
     """User profile for personalized search"""
     user_id: str
@@ -63,7 +80,7 @@ class UserProfile:
     category_preferences: Dict[str, float] = field(default_factory=dict)
     session_data: Dict[str, Any] = field(default_factory=dict)
 
-@dataclass
+@dataclass(**_SLOTS)
 class GeographicContext:
     """Geographic context for localized search"""
     country: str
@@ -77,7 +94,7 @@ class GeographicContext:
     language: str = "en"
     shipping_zones: List[str] = field(default_factory=list)
 
-@dataclass
+@dataclass(**_SLOTS)
 class SearchContext:
     """Complete search context including user, geography, and session data"""
     query: Optional[str] = None
@@ -89,7 +106,7 @@ class SearchContext:
     ab_test_group: Optional[str] = None
     search_intent: Optional[str] = None  # "browse", "purchase", "research"
 
-@dataclass
+@dataclass(**_SLOTS)
 class ProductScore:
     """Comprehensive product scoring"""
     product_id: str
@@ -104,6 +121,68 @@ class ProductScore:
     rank: int = 0
     explanation: Dict[str, Any] = field(default_factory=dict)
 
+@dataclass
+class CandidateArrays:
+    """Business-rule fields of a candidate list as parallel arrays (one entry per
+    product), with the same defaults the per-product rules apply"""
+    price: np.ndarray
+    original_price: np.ndarray
+    category_avg_price: np.ndarray
+    popularity: np.ndarray
+    view_count: np.ndarray
+    purchase_count: np.ndarray
+    rating: np.ndarray
+    review_count: np.ndarray
+    in_stock: np.ndarray
+    stock_level: np.ndarray
+    conversion_rate: np.ndarray
+    add_to_cart_rate: np.ndarray
+    return_rate: np.ndarray
+
+def _number(value: Any) -> Any:
+    """Pass through int/float values; anything else (numeric strings included,
+    which the per-product rules fail on) raises TypeError"""
+    if not isinstance(value, (int, float, np.number)):
+        raise TypeError(f"non-numeric business rule field: {value!r}")
+    return value
+
+def _to_soa(candidates: List[Dict[str, Any]]) -> CandidateArrays:
+    """Convert candidate products to CandidateArrays; raises TypeError on
+    non-numeric fields, which the per-product rules handle instead"""
+    def column(key: str, default: float) -> np.ndarray:
+        return np.fromiter(
+            (_number(product.get(key, default)) for product in candidates),
+            dtype=np.float64, count=len(candidates)
+        )
+    
+    price = column("price", 0)
+    original_price = np.fromiter(
+        (_number(product.get("original_price", product.get("price", 0))) for product in candidates),
+        dtype=np.float64, count=len(candidates)
+    )
+    category_avg_price = np.fromiter(
+        (_number(product.get("category_avg_price", product.get("price", 0))) for product in candidates),
+        dtype=np.float64, count=len(candidates)
+    )
+    return CandidateArrays(
+        price=price,
+        original_price=original_price,
+        category_avg_price=category_avg_price,
+        popularity=column("popularity_score", 0.5),
+        view_count=column("view_count", 0),
+        purchase_count=column("purchase_count", 0),
+        rating=column("rating", 3.0),
+        review_count=column("review_count", 0),
+        in_stock=np.fromiter(
+            (bool(product.get("in_stock", True)) for product in candidates),
+            dtype=bool, count=len(candidates)
+        ),
+        stock_level=column("stock_level", 100),
+        conversion_rate=column("conversion_rate", 0.05),
+        add_to_cart_rate=column("add_to_cart_rate", 0.1),
+        return_rate=column("return_rate", 0.1)
+    )
+
 class SimilarityCalculator:
     """Advanced similarity calculation with multiple metrics"""
     
@@ -122,10 +201,17 @@ class SimilarityCalculator:
     ) -> float:
         """Calculate visual similarity using cosine similarity with improvements"""
         try:
-            # Cosine similarity
-            cosine_sim = np.dot(query_embedding, product_embedding) / (
-                np.linalg.norm(query_embedding) * np.linalg.norm(product_embedding)
-            )
+            # Cosine similarity; SimSIMD computes it in one SIMD kernel instead
+            # of three NumPy calls (it returns the cosine distance)
+            if SIMSIMD_AVAILABLE:
+                cosine_sim = 1.0 - float(simsimd.cosine(
+                    np.asarray(query_embedding, dtype=np.float32),
+                    np.asarray(product_embedding, dtype=np.float32)
+                ))
+            else:
+                cosine_sim = np.dot(query_embedding, product_embedding) / (
+                    np.linalg.norm(query_embedding) * np.linalg.norm(product_embedding)
+                )
             
             # Apply non-linear transformation to spread scores
             enhanced_sim = 1 / (1 + np.exp(-10 * (cosine_sim - 0.5)))
@@ -135,6 +221,50 @@ class SimilarityCalculator:
             logger.error(f"Error calculating visual similarity: {e}")
             return 0.0
     
+    @staticmethod
+    def quantize_embedding(embedding: np.ndarray) -> np.ndarray:
+        """Symmetric per-vector int8 quantization for stored embeddings.
+
+        A quarter of the float32 bytes per scan; cosine is scale-invariant, so
+        the scale factor isn't needed for ranking"""
+        vector = np.asarray(embedding, dtype=np.float32)
+        max_abs = float(np.max(np.abs(vector))) if vector.size else 0.0
+        if max_abs == 0.0:
+            return np.zeros(vector.shape, dtype=np.int8)
+        return np.round(vector * (127.0 / max_abs)).astype(np.int8)
+    
+    def calculate_visual_similarities(
+        self,
+        query_embedding: np.ndarray,
+        product_embeddings: np.ndarray
+    ) -> np.ndarray:
+        """Batched calculate_visual_similarity against a (products, dim) matrix
+        of float32 embeddings, or of int8 embeddings from quantize_embedding"""
+        if SIMSIMD_AVAILABLE and product_embeddings.dtype == np.int8:
+            # Native i8 kernels for quantized embeddings
+            query = self.quantize_embedding(query_embedding)
+            cosine_sims = 1.0 - np.asarray(
+                simsimd.cdist(query[np.newaxis, :], product_embeddings, metric="cosine")
+            )[0]
+        else:
+            # Cosine ignores the quantization scale, so int8 rows are simply widened
+            # to float32 and matched against the unquantized query through BLAS
+            query = np.asarray(query_embedding, dtype=np.float32)
+            products = product_embeddings.astype(np.float32, copy=False)
+            if SIMSIMD_AVAILABLE:
+                cosine_sims = 1.0 - np.asarray(
+                    simsimd.cdist(query[np.newaxis, :], products, metric="cosine")
+                )[0]
+            else:
+                cosine_sims = (products @ query) / (
+                    np.linalg.norm(products, axis=1) * np.linalg.norm(query)
+                )
+        
+        # Same non-linear transformation as the single-product path
+        enhanced_sims = 1 / (1 + np.exp(-10 * (cosine_sims - 0.5)))
+        
+        return np.clip(enhanced_sims, 0, 1)
+    
     def calculate_textual_similarity(
         self,
         query_text: str,
@@ -224,15 +354,15 @@ class SimilarityCalculator:
             
             similarity_score = 0.0
             
-            # Purchase history similarity
-            product_category = product_metadata.get("category", "")
-            if product_category in user_profile.category_preferences:
-                similarity_score += user_profile.category_preferences[product_category] * 0.4
+            # Purchase history similarity (one lookup per preference map)
+            category_preference = user_profile.category_preferences.get(product_metadata.get("category", ""))
+            if category_preference is not None:
+                similarity_score += category_preference * 0.4
             
             # Brand loyalty
-            product_brand = product_metadata.get("brand", "")
-            if product_brand in user_profile.brand_loyalty:
-                similarity_score += user_profile.brand_loyalty[product_brand] * 0.3
+            brand_loyalty = user_profile.brand_loyalty.get(product_metadata.get("brand", ""))
+            if brand_loyalty is not None:
+                similarity_score += brand_loyalty * 0.3
             
             # Price range preference
             product_price = product_metadata.get("price", 0)
@@ -379,6 +509,61 @@ class BusinessLogicEngine:
             logger.error(f"Error applying conversion rate boost: {e}")
             return 0.5
     
+    def popularity_boosts(self, candidates: CandidateArrays) -> np.ndarray:
+        """Vectorized apply_popularity_boost over all candidates"""
+        return (
+            candidates.popularity * 0.3 +
+            np.minimum(1.0, candidates.view_count / 10000) * 0.2 +
+            np.minimum(1.0, candidates.purchase_count / 1000) * 0.3 +
+            (candidates.rating - 1) / 4 * 0.15 +
+            np.minimum(1.0, candidates.review_count / 500) * 0.05
+        )
+    
+    def stock_availability_scores(self, candidates: CandidateArrays) -> np.ndarray:
+        """Vectorized apply_stock_availability over all candidates"""
+        stock_level = candidates.stock_level
+        return np.select(
+            [~candidates.in_stock, stock_level > 50, stock_level > 10, stock_level > 0],
+            [0.1, 1.0, 0.8, 0.6],
+            default=0.2
+        )
+    
+    def price_competitiveness_scores(self, candidates: CandidateArrays) -> np.ndarray:
+        """Vectorized apply_price_competitiveness over all candidates"""
+        price = candidates.price
+        original_price = candidates.original_price
+        category_avg_price = candidates.category_avg_price
+        
+        # Discount factor
+        discounted = original_price > price
+        discount_factor = np.divide(
+            original_price - price, original_price,
+            out=np.zeros_like(price), where=discounted
+        )
+        
+        # Price competitiveness vs category average
+        has_average = category_avg_price > 0
+        relative_gap = np.divide(
+            np.abs(category_avg_price - price), category_avg_price,
+            out=np.zeros_like(price), where=has_average
+        ) * 0.3
+        price_competitiveness = np.where(
+            has_average,
+            np.where(price < category_avg_price, 0.7 + relative_gap, 0.7 - relative_gap),
+            0.5
+        )
+        
+        # Combine discount and competitiveness
+        return np.maximum(0.1, np.minimum(1.0, price_competitiveness + discount_factor * 0.3))
+    
+    def conversion_rate_boosts(self, candidates: CandidateArrays) -> np.ndarray:
+        """Vectorized apply_conversion_rate_boost over all candidates"""
+        return (
+            np.minimum(1.0, candidates.conversion_rate / 0.2) * 0.5 +
+            np.minimum(1.0, candidates.add_to_cart_rate / 0.3) * 0.3 +
+            np.maximum(0.0, 1.0 - candidates.return_rate / 0.1) * 0.2
+        )
+    
     def apply_geographic_relevance(
         self,
         product_metadata: Dict[str, Any],
@@ -471,15 +656,15 @@ class PersonalizationEngine:
         """Calculate how well product aligns with user preferences"""
         alignment_score = 0.0
         
-        # Category preference
-        product_category = product_metadata.get("category", "")
-        if product_category in user_profile.category_preferences:
-            alignment_score += user_profile.category_preferences[product_category] * 0.4
+        # Category preference (one lookup per preference map)
+        category_preference = user_profile.category_preferences.get(product_metadata.get("category", ""))
+        if category_preference is not None:
+            alignment_score += category_preference * 0.4
         
         # Brand preference
-        product_brand = product_metadata.get("brand", "")
-        if product_brand in user_profile.brand_loyalty:
-            alignment_score += user_profile.brand_loyalty[product_brand] * 0.3
+        brand_loyalty = user_profile.brand_loyalty.get(product_metadata.get("brand", ""))
+        if brand_loyalty is not None:
+            alignment_score += brand_loyalty * 0.3
         
         # Price sensitivity alignment
         product_price = product_metadata.get("price", 0)
@@ -649,6 +834,19 @@ class PersonalizationEngine:
         else:
             return "luxury"
 
+def _stable_hash(value: str) -> int:
+    """Process-independent 64-bit hash of a string (xxh3 when available)"""
+    data = value.encode()
+    if XXHASH_AVAILABLE:
+        return xxhash.xxh3_64_intdigest(data)
+    return int.from_bytes(hashlib.blake2b(data, digest_size=8).digest(), "little")
+
+# Counter columns for A/B interactions; other interaction types share the last one
+INTERACTION_TYPES = ("view", "click", "purchase", "add_to_cart")
+_INTERACTION_INDEX = {interaction: i for i, interaction in enumerate(INTERACTION_TYPES)}
+_OTHER_INTERACTION = len(INTERACTION_TYPES)
+_ALGORITHM_INDEX = {algorithm: i for i, algorithm in enumerate(RankingAlgorithm)}
+
 class ABTestingFramework:
     """A/B testing framework for ranking algorithms"""
     
@@ -689,7 +887,11 @@ class ABTestingFramework:
         }
         
         self.active_tests = {}
-        self.test_results = defaultdict(list)
+        # Interaction counts per (algorithm, interaction type): recording is one
+        # in-place increment instead of an ever-growing list of event dicts
+        self.interaction_counts = np.zeros((len(RankingAlgorithm), len(INTERACTION_TYPES) + 1), dtype=np.int64)
+        # Mobile-adjusted weights per algorithm, built on first use
+        self._mobile_weights: Dict[RankingAlgorithm, Dict[str, float]] = {}
     
     def assign_test_group(
         self,
@@ -707,8 +909,9 @@ class ABTestingFramework:
         else:
             hash_input = session_id
         
-        # Simple hash-based assignment
-        hash_value = hash(hash_input) % len(available_algorithms)
+        # Hash-based assignment; unlike hash(), the digest is the same in every
+        # process and across restarts, so assignments stay sticky
+        hash_value = _stable_hash(hash_input) % len(available_algorithms)
         assigned_algorithm = available_algorithms[hash_value]
         
         # Store assignment
@@ -730,10 +933,14 @@ class ABTestingFramework:
         
         # Apply contextual modifications
         if context.device_type == "mobile":
-            # Mobile users might prefer faster results (similarity-first)
-            weights = base_weights.copy()
-            weights["similarity_weight"] = weights.get("similarity_weight", 0.4) * 1.2
-            weights = self._normalize_weights(weights)
+            # Mobile users might prefer faster results (similarity-first); the
+            # adjustment only depends on the algorithm, so it is memoized
+            weights = self._mobile_weights.get(algorithm)
+            if weights is None:
+                weights = base_weights.copy()
+                weights["similarity_weight"] = weights.get("similarity_weight", 0.4) * 1.2
+                weights = self._normalize_weights(weights)
+                self._mobile_weights[algorithm] = weights
             return weights
         
         return base_weights
@@ -751,16 +958,9 @@ class ABTestingFramework:
             return
         
         test_info = self.active_tests[session_id]
-        interaction_data = {
-            "session_id": session_id,
-            "algorithm": test_info["algorithm"].value,
-            "product_id": product_id,
-            "interaction_type": interaction_type,  # "click", "view", "purchase", etc.
-            "position": position,
-            "timestamp": timestamp or datetime.now()
-        }
-        
-        self.test_results[test_info["algorithm"]].append(interaction_data)
+        algorithm_index = _ALGORITHM_INDEX[test_info["algorithm"]]
+        interaction_index = _INTERACTION_INDEX.get(interaction_type, _OTHER_INTERACTION)  # "click", "view", "purchase", etc.
+        self.interaction_counts[algorithm_index, interaction_index] += 1
     
     def get_test_performance(
         self,
@@ -768,20 +968,20 @@ class ABTestingFramework:
         metric: str = "ctr"  # "ctr", "conversion", "engagement"
     ) -> Dict[str, float]:
         """Get performance metrics for A/B test"""
-        results = self.test_results[algorithm]
-        if not results:
+        counts = self.interaction_counts[_ALGORITHM_INDEX[algorithm]]
+        total = int(counts.sum())
+        if not total:
             return {"metric": 0.0, "sample_size": 0}
         
+        clicks = int(counts[_INTERACTION_INDEX["click"]])
         if metric == "ctr":
-            clicks = sum(1 for r in results if r["interaction_type"] == "click")
-            views = len(results)
+            views = total
             return {
                 "ctr": clicks / max(views, 1),
                 "sample_size": views
             }
         elif metric == "conversion":
-            purchases = sum(1 for r in results if r["interaction_type"] == "purchase")
-            clicks = sum(1 for r in results if r["interaction_type"] == "click")
+            purchases = int(counts[_INTERACTION_INDEX["purchase"]])
             return {
                 "conversion_rate": purchases / max(clicks, 1),
                 "sample_size": clicks
@@ -827,12 +1027,19 @@ class AdvancedSearchEngine:
             algorithm = RankingAlgorithm(context.ab_test_group)
             weights = self.ab_testing.get_algorithm_weights(algorithm, context)
             
+            # Visual similarity and the catalog-field business rules for every
+            # candidate in batched array passes
+            visual_scores = self._calculate_visual_scores(query_data, candidate_products)
+            rule_scores = self._calculate_business_rule_scores(candidate_products)
+            
             # Calculate scores for all products
             product_scores = []
             
-            for product in candidate_products:
+            for position, product in enumerate(candidate_products):
                 score = await self._calculate_product_score(
-                    query_data, product, context, weights
+                    query_data, product, context, weights,
+                    visual_scores.get(position),
+                    rule_scores[position] if rule_scores is not None else None
                 )
                 product_scores.append(score)
             
@@ -844,7 +1051,7 @@ class AdvancedSearchEngine:
                 score.rank = i + 1
             
             processing_time = time.time() - start_time
-            logger.info(f"Advanced search completed in {processing_time:.3f}s for {len(product_scores)} products")
+            logger.info("Advanced search completed in %.3fs for %d products", processing_time, len(product_scores))
             
             return product_scores
             
@@ -852,12 +1059,42 @@ class AdvancedSearchEngine:
             logger.error(f"Error in advanced search: {e}")
             return []
     
+    def _calculate_visual_scores(
+        self,
+        query_data: Dict[str, Any],
+        candidate_products: List[Dict[str, Any]]
+    ) -> Dict[int, float]:
+        """Visual similarity by candidate position for products with an image embedding"""
+        if "query_image_embedding" not in query_data:
+            return {}
+        
+        positions = [i for i, product in enumerate(candidate_products) if "image_embedding" in product]
+        if not positions:
+            return {}
+        
+        try:
+            stored = [candidate_products[i]["image_embedding"] for i in positions]
+            # Embeddings quantized at ingest stay int8 for the scan
+            quantized = all(isinstance(e, np.ndarray) and e.dtype == np.int8 for e in stored)
+            embeddings = np.array(stored, dtype=np.int8 if quantized else np.float32)
+            similarities = self.similarity_calculator.calculate_visual_similarities(
+                query_data["query_image_embedding"], embeddings
+            )
+        except ValueError as e:
+            # Ragged embeddings; leave them to the per-product path
+            logger.warning(f"Falling back to per-product visual similarity: {e}")
+            return {}
+        
+        return dict(zip(positions, similarities.tolist()))
+    
     async def _calculate_product_score(
         self,
         query_data: Dict[str, Any],
         product: Dict[str, Any],
         context: SearchContext,
-        weights: Dict[str, float]
+        weights: Dict[str, float],
+        visual_similarity: Optional[float] = None,
+        business_rules_score: Optional[float] = None
     ) -> ProductScore:
         """Calculate comprehensive score for a single product"""
         try:
@@ -865,10 +1102,10 @@ class AdvancedSearchEngine:
             
             # Calculate individual scores
             similarity_scores = await self._calculate_similarity_scores(
-                query_data, product, context
+                query_data, product, context, visual_similarity
             )
             
-            business_score = self._calculate_business_score(product, context)
+            business_score = self._calculate_business_score(product, context, business_rules_score)
             personalization_score = self.personalization_engine.calculate_personalization_score(
                 product, context.user_profile, context
             )
@@ -924,9 +1161,10 @@ class AdvancedSearchEngine:
         self,
         query_data: Dict[str, Any],
         product: Dict[str, Any],
-        context: SearchContext
+        context: SearchContext,
+        visual_similarity: Optional[float] = None
     ) -> Dict[str, float]:
-        """Calculate all similarity scores"""
+        """Calculate all similarity scores (visual_similarity: precomputed by the batch path)"""
         scores = {
             "visual": 0.0,
             "textual": 0.0,
@@ -937,10 +1175,12 @@ class AdvancedSearchEngine:
         
         try:
             # Visual similarity
-            if "query_image_embedding" in query_data and "image_embedding" in product:
+            if visual_similarity is not None:
+                scores["visual"] = visual_similarity
+            elif "query_image_embedding" in query_data and "image_embedding" in product:
                 scores["visual"] = self.similarity_calculator.calculate_visual_similarity(
                     query_data["query_image_embedding"],
-                    np.array(product["image_embedding"])
+                    np.asarray(product["image_embedding"], dtype=np.float32)
                 )
             
             # Textual similarity
@@ -976,16 +1216,43 @@ class AdvancedSearchEngine:
         
         return scores
     
+    def _calculate_business_rule_scores(
+        self,
+        candidate_products: List[Dict[str, Any]]
+    ) -> Optional[List[float]]:
+        """Weighted popularity, stock, price and conversion scores for all candidates,
+        or None when a field isn't numeric (the per-product rules handle that)"""
+        try:
+            candidates = _to_soa(candidate_products)
+        except (TypeError, ValueError) as e:
+            logger.warning(f"Falling back to per-product business rules: {e}")
+            return None
+        
+        engine = self.business_engine
+        weights = engine.rule_weights
+        return (
+            engine.popularity_boosts(candidates) * weights[BusinessRule.POPULARITY_BOOST] +
+            engine.stock_availability_scores(candidates) * weights[BusinessRule.STOCK_AVAILABILITY] +
+            engine.price_competitiveness_scores(candidates) * weights[BusinessRule.PRICE_COMPETITIVENESS] +
+            engine.conversion_rate_boosts(candidates) * weights[BusinessRule.CONVERSION_RATE]
+        ).tolist()
+    
     def _calculate_business_score(
         self,
         product: Dict[str, Any],
-        context: SearchContext
+        context: SearchContext,
+        business_rules_score: Optional[float] = None
     ) -> float:
-        """Calculate overall business logic score"""
+        """Calculate overall business logic score (business_rules_score: the batched
+        popularity/stock/price/conversion part, if already computed)"""
         try:
             business_scores = {}
             weights = self.business_engine.rule_weights
             
+            if business_rules_score is not None:
+                geographic = self.business_engine.apply_geographic_relevance(product, context)
+                return business_rules_score + geographic * weights[BusinessRule.GEOGRAPHIC_PREFERENCE]
+            
             # Calculate individual business rule scores
             business_scores["popularity"] = self.business_engine.apply_popularity_boost(product, context)
             business_scores["stock"] = self.business_engine.apply_stock_availability(product, context)
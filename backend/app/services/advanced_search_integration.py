@@ -5,8 +5,6 @@ Provides high-level interface for advanced search functionality.
 """
 
 import logging
-import asyncio
-import json
 from typing import Dict, List, Optional, Any, Tuple
 from datetime import datetime
 import time
@@ -679,7 +677,7 @@ class AdvancedSearchIntegration:
     ):
         """Store interaction data for analytics"""
         # This would typically store in a database or analytics service
-        logger.debug(f"Interaction: {session_id}, {product_id}, {interaction_type}, pos: {position}")
+        logger.debug("Interaction: %s, %s, %s, pos: %s", session_id, product_id, interaction_type, position)
     
     def _generate_algorithm_recommendations(
         self,
@@ -94,6 +94,8 @@ class PerformanceCacheService:
     def __init__(self):
         self.redis_url = os.getenv("REDIS_URL", "redis://localhost:6379")
         self.redis_client = None
+        self.connection_pool = None
+        self.max_connections = int(os.getenv("REDIS_MAX_CONNECTIONS", 50))
         self.memory_cache: Dict[str, Any] = {}
         self.memory_cache_ttl: Dict[str, datetime] = {}
         self.stats = CacheStats()
@@ -116,16 +118,23 @@ class PerformanceCacheService:
             logger.warning("Redis not available, using memory cache only")
             return
             
+        if self.redis_client is not None:
+            return
+            
         try:
-            if hasattr(redis, 'from_url'):
-                self.redis_client = await redis.from_url(
+            if hasattr(redis, 'BlockingConnectionPool') and hasattr(redis, 'from_url'):
+                # One shared pool for every get/set: no TCP/AUTH handshake per operation,
+                # and callers wait for a free connection instead of failing at the cap
+                self.connection_pool = redis.BlockingConnectionPool.from_url(
                     self.redis_url,
                     encoding="utf-8",
                     decode_responses=False,
                     socket_connect_timeout=5,
                     socket_timeout=5,
-                    max_connections=20
+                    max_connections=self.max_connections,
+                    timeout=5
                 )
+                self.redis_client = redis.Redis(connection_pool=self.connection_pool)
             else:
                 # Fallback for older redis versions
                 self.redis_client = redis.Redis.from_url(
@@ -144,6 +153,7 @@ class PerformanceCacheService:
         except Exception as e:
             logger.warning(f"Redis connection failed, using memory cache only: {e}")
             self.redis_client = None
+            self.connection_pool = None
     
     async def get(self, key: str, default: Any = None) -> Any:
         """Get value from cache with performance tracking"""
@@ -403,6 +413,13 @@ class PerformanceCacheService:
                 "avg_set_time_ms": self.stats.avg_set_time * 1000,
             },
             "redis_connected": self.redis_client is not None,
+            "redis_pool": {
+                "max_connections": self.connection_pool.max_connections,
+                "connection_kwargs": {
+                    key: value for key, value in self.connection_pool.connection_kwargs.items()
+                    if key != "password"
+                },
+            } if self.connection_pool is not None else None,
             "memory_cache_size": len(self.memory_cache),
             "operation_counts": {
                 "get_operations": len(self.operation_times["get"]),
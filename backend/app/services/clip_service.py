@@ -13,10 +13,20 @@ from contextlib import contextmanager
 import os
 import psutil
 
+try:
+    import simsimd
+    SIMSIMD_AVAILABLE = True
+except ImportError:
+    simsimd = None
+    SIMSIMD_AVAILABLE = False
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Tokenized single-text queries kept per service (search queries repeat often)
+TOKEN_CACHE_SIZE = 1024
+
 class CLIPModelCache:
     """Singleton class to manage CLIP model caching"""
     _instance = None
@@ -70,6 +80,10 @@ class CLIPService:
         self.fallback_to_cpu = fallback_to_cpu
         self.cache = CLIPModelCache()
         self.executor = ThreadPoolExecutor(max_workers=max_workers)
+        # The shared processor's fast tokenizer mutates its padding/truncation
+        # state per call, so preprocessing is serialized; forward passes are not
+        self._processor_lock = threading.Lock()
+        self._tokenize_text = lru_cache(maxsize=TOKEN_CACHE_SIZE)(self._tokenize_text_uncached)
         
         # Device selection with memory management
         self.device = self._select_device()
@@ -90,6 +104,10 @@ class CLIPService:
             else:
                 logger.warning(f"GPU memory ({gpu_memory_gb:.1f}GB) insufficient for CLIP. Using CPU.")
         
+        # Apple silicon GPU (shares system memory, so no separate threshold)
+        if torch.backends.mps.is_available():
+            return "mps"
+        
         # Check system RAM
         system_memory = psutil.virtual_memory()
         if system_memory.total < 8 * (1024**3):  # Less than 8GB RAM
@@ -132,6 +150,9 @@ class CLIPService:
             self.cache.device = self.device
             self.cache.model_name = self.model_name
             
+            if self.device != "cpu":
+                self._warm_up()
+            
             logger.info("CLIP model loaded successfully")
             
         except torch.cuda.OutOfMemoryError:
@@ -149,6 +170,14 @@ class CLIPService:
             else:
                 raise RuntimeError(f"Failed to load CLIP model: {e}")
     
+    def _warm_up(self):
+        """Run one text forward pass so kernel selection and allocator setup on
+        the accelerator happen at load time rather than on the first request"""
+        inputs = self._preprocess(text=["warm up"], return_tensors="pt", padding=True)
+        inputs = {k: v.to(self.device, non_blocking=True) for k, v in inputs.items()}
+        with torch.inference_mode():
+            self.cache.model.get_text_features(**inputs)
+    
     def _load_model_cpu_fallback(self):
         """Fallback method to load model on CPU"""
         try:
@@ -164,13 +193,15 @@ class CLIPService:
     
     @contextmanager
     def _memory_management(self):
-        """Context manager for memory management during inference"""
+        """Release cached GPU memory after an out-of-memory error. Not done after
+        every pass: encodes run concurrently on the worker pool, and a full
+        collection or cache flush would stall the other in-flight forwards"""
         try:
             yield
-        finally:
-            if torch.cuda.is_available():
-                torch.cuda.empty_cache()
+        except torch.cuda.OutOfMemoryError:
+            torch.cuda.empty_cache()
             gc.collect()
+            raise
     
     def _validate_inputs(self, inputs: Union[str, List[str], Image.Image, List[Image.Image]]) -> bool:
         """Validate input data"""
@@ -198,6 +229,27 @@ class CLIPService:
         
         return np.vstack(results) if results else np.array([])
     
+    def _preprocess(self, **kwargs) -> dict:
+        """Run the shared CLIPProcessor under the processor lock"""
+        with self._processor_lock:
+            return self.cache.processor(**kwargs)
+    
+    def _tokenize_text_uncached(self, text: str) -> dict:
+        """Tokenize one text into CPU tensors (cached per service as _tokenize_text)"""
+        return self._preprocess(
+            text=[text], 
+            return_tensors="pt", 
+            padding=True,
+            truncation=True,
+            max_length=77
+        )
+    
+    async def _run_inference(self, func, *args):
+        """Run a blocking forward pass on the worker pool, so the event loop keeps
+        serving and concurrent encode calls overlap (up to max_workers)"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, func, *args)
+    
     async def encode_text(self, text: str) -> np.ndarray:
         """
         Encode single text to embedding vector with error handling.
@@ -218,21 +270,18 @@ class CLIPService:
         try:
             self._ensure_model_loaded()
             
-            with self._memory_management():
-                inputs = self.cache.processor(
-                    text=[text], 
-                    return_tensors="pt", 
-                    padding=True,
-                    truncation=True,
-                    max_length=77
-                )
-                inputs = {k: v.to(self.device) for k, v in inputs.items()}
-                
-                with torch.no_grad():
-                    text_features = self.cache.model.get_text_features(**inputs)
-                    text_features = text_features / text_features.norm(dim=-1, keepdim=True)
-                
-                return text_features.cpu().numpy()[0]
+            def encode():
+                with self._memory_management():
+                    inputs = self._tokenize_text(text)
+                    inputs = {k: v.to(self.device, non_blocking=True) for k, v in inputs.items()}
+                    
+                    with torch.inference_mode():
+                        text_features = self.cache.model.get_text_features(**inputs)
+                        text_features = text_features / text_features.norm(dim=-1, keepdim=True)
+                    
+                    return text_features.cpu().numpy()[0]
+            
+            return await self._run_inference(encode)
                 
         except Exception as e:
             logger.error(f"Error encoding text: {e}")
@@ -262,19 +311,22 @@ class CLIPService:
             if image.mode != 'RGB':
                 image = image.convert('RGB')
             
-            with self._memory_management():
-                inputs = self.cache.processor(
-                    images=[image], 
-                    return_tensors="pt", 
-                    padding=True
-                )
-                inputs = {k: v.to(self.device) for k, v in inputs.items()}
-                
-                with torch.no_grad():
-                    image_features = self.cache.model.get_image_features(**inputs)
-                    image_features = image_features / image_features.norm(dim=-1, keepdim=True)
-                
-                return image_features.cpu().numpy()[0]
+            def encode():
+                with self._memory_management():
+                    inputs = self._preprocess(
+                        images=[image], 
+                        return_tensors="pt", 
+                        padding=True
+                    )
+                    inputs = {k: v.to(self.device, non_blocking=True) for k, v in inputs.items()}
+                    
+                    with torch.inference_mode():
+                        image_features = self.cache.model.get_image_features(**inputs)
+                        image_features = image_features / image_features.norm(dim=-1, keepdim=True)
+                    
+                    return image_features.cpu().numpy()[0]
+            
+            return await self._run_inference(encode)
                 
         except Exception as e:
             logger.error(f"Error encoding image: {e}")
@@ -307,27 +359,40 @@ class CLIPService:
             self._ensure_model_loaded()
             
             def process_batch(batch_texts):
-                with torch.no_grad():
-                    inputs = self.cache.processor(
+                with torch.inference_mode():
+                    inputs = self._preprocess(
                         text=batch_texts, 
                         return_tensors="pt", 
                         padding=True, 
                         truncation=True,
                         max_length=77
                     )
-                    inputs = {k: v.to(self.device) for k, v in inputs.items()}
+                    inputs = {k: v.to(self.device, non_blocking=True) for k, v in inputs.items()}
                     
                     text_features = self.cache.model.get_text_features(**inputs)
                     text_features = text_features / text_features.norm(dim=-1, keepdim=True)
                     
                     return text_features.cpu().numpy()
             
+            # Tokenize and encode each distinct text once; duplicates are
+            # expanded back to input order afterwards
+            unique_texts = list(dict.fromkeys(valid_texts))
+            
             # Process in batches if list is large
-            if len(valid_texts) > (batch_size or self.batch_size):
-                return self._process_in_batches(valid_texts, process_batch, batch_size)
+            if len(unique_texts) > (batch_size or self.batch_size):
+                embeddings = await self._run_inference(self._process_in_batches, unique_texts, process_batch, batch_size)
             else:
-                with self._memory_management():
-                    return process_batch(valid_texts)
+                def encode():
+                    with self._memory_management():
+                        return process_batch(unique_texts)
+                
+                embeddings = await self._run_inference(encode)
+            
+            if len(unique_texts) < len(valid_texts):
+                position = {text: i for i, text in enumerate(unique_texts)}
+                embeddings = embeddings[[position[text] for text in valid_texts]]
+            
+            return embeddings
                     
         except Exception as e:
             logger.error(f"Error encoding batch texts: {e}")
@@ -366,13 +431,13 @@ class CLIPService:
             self._ensure_model_loaded()
             
             def process_batch(batch_images):
-                with torch.no_grad():
-                    inputs = self.cache.processor(
+                with torch.inference_mode():
+                    inputs = self._preprocess(
                         images=batch_images, 
                         return_tensors="pt", 
                         padding=True
                     )
-                    inputs = {k: v.to(self.device) for k, v in inputs.items()}
+                    inputs = {k: v.to(self.device, non_blocking=True) for k, v in inputs.items()}
                     
                     image_features = self.cache.model.get_image_features(**inputs)
                     image_features = image_features / image_features.norm(dim=-1, keepdim=True)
@@ -381,10 +446,13 @@ class CLIPService:
             
             # Process in batches if list is large
             if len(valid_images) > (batch_size or self.batch_size):
-                return self._process_in_batches(valid_images, process_batch, batch_size)
+                return await self._run_inference(self._process_in_batches, valid_images, process_batch, batch_size)
             else:
-                with self._memory_management():
-                    return process_batch(valid_images)
+                def encode():
+                    with self._memory_management():
+                        return process_batch(valid_images)
+                
+                return await self._run_inference(encode)
                     
         except Exception as e:
             logger.error(f"Error encoding batch images: {e}")
@@ -402,12 +470,18 @@ class CLIPService:
             Similarity score between 0 and 1
         """
         try:
-            # Ensure embeddings are normalized
-            text_norm = text_embedding / np.linalg.norm(text_embedding)
-            image_norm = image_embedding / np.linalg.norm(image_embedding)
-            
-            # Compute cosine similarity
-            similarity = np.dot(text_norm, image_norm)
+            if SIMSIMD_AVAILABLE:
+                # SIMD cosine distance (1 - cosine similarity), normalization included
+                distance = simsimd.cosine(
+                    np.asarray(text_embedding, dtype=np.float32),
+                    np.asarray(image_embedding, dtype=np.float32)
+                )
+                similarity = 1.0 - float(distance)
+            else:
+                # Cosine similarity without materializing normalized copies
+                similarity = float(np.dot(text_embedding, image_embedding) / (
+                    np.linalg.norm(text_embedding) * np.linalg.norm(image_embedding)
+                ))
             
             # Convert to 0-1 range
             return (similarity + 1) / 2
@@ -137,7 +137,7 @@ class EnhancedImageService:
     
     async def search_by_image(self, image_data: bytes, options: Optional[Dict[str, Any]] = None) -> SearchResponse:
         """Enhanced image search with caching and optimization"""
-        start_time = time.time()
+        start_time = time.perf_counter_ns()
         options = options or {}
         
         try:
@@ -189,7 +189,7 @@ class EnhancedImageService:
             await cache_service.set(cache_key, response.dict(), ttl=1800)  # 30 minutes
             
             # Update stats
-            processing_time = time.time() - start_time
+            processing_time = (time.perf_counter_ns() - start_time) / 1e9
             self.stats.images_processed += 1
             self.stats.total_processing_time += processing_time
             self.stats.avg_processing_time = self.stats.total_processing_time / self.stats.images_processed
@@ -263,7 +263,7 @@ class EnhancedImageService:
         if sizes is None:
             sizes = ["small", "medium", "large"]
         
-        start_time = time.time()
+        start_time = time.perf_counter_ns()
         image_hash = hashlib.md5(image_data).hexdigest()
         
         thumbnails = {}
@@ -303,7 +303,7 @@ class EnhancedImageService:
                 
                 self.stats.thumbnails_generated += 1
             
-            logger.info(f"Generated {len(thumbnails)} thumbnails in {time.time() - start_time:.3f}s")
+            logger.info(f"Generated {len(thumbnails)} thumbnails in {(time.perf_counter_ns() - start_time) / 1e9:.3f}s")
             return thumbnails
             
         except Exception as e:
@@ -356,8 +356,14 @@ class EnhancedImageService:
             
             # Generate embedding if requested
             if options.get("generate_embedding", False):
-                processed_image = await self._load_and_preprocess_image(image_data, image_hash)
-                embedding = await self.clip_service.encode_image(processed_image)
+                # Same content-hash embedding cache as image search
+                embedding_cache_key = CacheKey.image_embedding(image_hash)
+                embedding = await cache_service.get(embedding_cache_key)
+                
+                if embedding is None:
+                    processed_image = await self._load_and_preprocess_image(image_data, image_hash)
+                    embedding = await self.clip_service.encode_image(processed_image)
+                    await cache_service.set(embedding_cache_key, embedding, ttl=7200)  # 2 hours
                 result["embedding"] = embedding.tolist() if hasattr(embedding, 'tolist') else embedding
             
             # Generate thumbnails if requested
@@ -11,6 +11,12 @@ import io
 
 logger = logging.getLogger(__name__)
 
+def _normalize(embedding: np.ndarray) -> np.ndarray:
+    """Scale an embedding to unit length (zero vectors are returned unchanged)"""
+    vector = np.asarray(embedding, dtype=np.float64)
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm > 0 else vector
+
 class MockVectorService:
     """
     Mock vector service for demonstration purposes.
@@ -33,10 +39,6 @@ class MockVectorService:
             Mock embedding as numpy array
         """
         try:
-            # Simulate processing time
-            import time
-            time.sleep(0.1)
-            
             # Generate a deterministic but seemingly random embedding
             if isinstance(image_data, bytes):
                 # Use hash of image data for consistency
@@ -102,8 +104,10 @@ class MockVectorService:
             Success status
         """
         try:
+            # Stored embeddings are unit length, so search scores them with a
+            # plain dot product instead of recomputing norms per comparison
             self.mock_database[product_id] = {
-                "embedding": embedding,
+                "embedding": _normalize(embedding),
                 "metadata": metadata or {}
             }
             logger.debug(f"Stored embedding for product {product_id}")
@@ -132,6 +136,7 @@ class MockVectorService:
         """
         try:
             results = []
+            query_unit = _normalize(query_embedding)
             
             for product_id, data in self.mock_database.items():
                 product_embedding = data["embedding"]
@@ -147,10 +152,8 @@ class MockVectorService:
                     if skip_product:
                         continue
                 
-                # Calculate cosine similarity
-                similarity = np.dot(query_embedding, product_embedding) / (
-                    np.linalg.norm(query_embedding) * np.linalg.norm(product_embedding)
-                )
+                # Cosine similarity (both vectors are unit length)
+                similarity = np.dot(query_unit, product_embedding)
                 
                 results.append({
                     "product_id": product_id,
@@ -176,7 +179,7 @@ class MockVectorService:
             product_id: Product identifier
             
         Returns:
-            Product embedding or None if not found
+            Product embedding (unit length) or None if not found
         """
         try:
             if product_id in self.mock_database:
@@ -15,11 +15,13 @@ from collections import defaultdict, deque
 from functools import wraps
 import threading
 from contextlib import contextmanager
+import numpy as np
 
 try:
-    from prometheus_client import Counter, Histogram, Gauge, Summary, CollectorRegistry, generate_latest
+    from prometheus_client import Counter, Histogram, Gauge, Summary, CollectorRegistry, generate_latest, CONTENT_TYPE_LATEST
     PROMETHEUS_AVAILABLE = True
 except ImportError:
+    CONTENT_TYPE_LATEST = "text/plain; version=0.0.4; charset=utf-8"
     PROMETHEUS_AVAILABLE = False
 
 try:
@@ -58,6 +60,11 @@ class AlertRule:
     severity: str = "warning"  # "info", "warning", "error", "critical"
     enabled: bool = True
 
+# Scrape bodies are reused for this long, so concurrent or HA-pair scrapers
+# don't each re-walk the registry
+PROMETHEUS_EXPORT_TTL_SECONDS = 1.0
+PROMETHEUS_UNAVAILABLE_BODY = b"# Prometheus not available\n"
+
 class MetricsCollector:
     """High-performance metrics collection system"""
     
@@ -67,6 +74,7 @@ class MetricsCollector:
         self.gauges: Dict[str, float] = defaultdict(float)
         self.histograms: Dict[str, List[float]] = defaultdict(list)
         self.max_metric_history = 10000
+        self._prometheus_export = (0.0, b"")  # (generated at, body)
         
         # Prometheus metrics
         if PROMETHEUS_AVAILABLE:
@@ -235,27 +243,40 @@ class MetricsCollector:
         if not recent_metrics:
             return {"count": 0, "message": "No recent data"}
         
-        values = [m.value for m in recent_metrics]
+        values = np.fromiter((m.value for m in recent_metrics), dtype=np.float64, count=len(recent_metrics))
+        
+        # Nearest-rank percentiles (the sorted-list index int(n * q), with max() for
+        # small samples), picked by a single partition pass instead of three sorts
+        n = values.size
+        ranks = [n // 2, int(n * 0.95) if n > 5 else n - 1, int(n * 0.99) if n > 10 else n - 1]
+        p50, p95, p99 = np.partition(values, ranks)[ranks]
         
         return {
-            "count": len(values),
-            "sum": sum(values),
-            "min": min(values),
-            "max": max(values),
-            "avg": sum(values) / len(values),
-            "p50": sorted(values)[len(values) // 2] if values else 0,
-            "p95": sorted(values)[int(len(values) * 0.95)] if len(values) > 5 else max(values),
-            "p99": sorted(values)[int(len(values) * 0.99)] if len(values) > 10 else max(values),
-            "latest": values[-1] if values else 0,
-            "trend": "increasing" if len(values) > 1 and values[-1] > values[0] else "stable"
+            "count": int(values.size),
+            "sum": float(values.sum()),
+            "min": float(values.min()),
+            "max": float(values.max()),
+            "avg": float(values.mean()),
+            "p50": float(p50),
+            "p95": float(p95),
+            "p99": float(p99),
+            "latest": float(values[-1]),
+            "trend": "increasing" if values.size > 1 and values[-1] > values[0] else "stable"
         }
     
-    def export_prometheus_metrics(self) -> str:
-        """Export metrics in Prometheus format"""
+    def export_prometheus_metrics(self) -> bytes:
+        """Export metrics in Prometheus text format, as the encoded response body"""
         if not PROMETHEUS_AVAILABLE:
-            return "# Prometheus not available\n"
+            return PROMETHEUS_UNAVAILABLE_BODY
+        
+        now = time.monotonic()
+        generated_at, body = self._prometheus_export
+        if body and now - generated_at < PROMETHEUS_EXPORT_TTL_SECONDS:
+            return body
         
-        return generate_latest(self.registry).decode('utf-8')
+        body = generate_latest(self.registry)
+        self._prometheus_export = (now, body)
+        return body
 
 class PerformanceProfiler:
     """Function and endpoint performance profiler"""
@@ -10,7 +10,6 @@ from typing import List, Optional, Dict, Any, Tuple, Union
 from dataclasses import dataclass, field
 from datetime import datetime, timedelta
 from collections import defaultdict, deque
-import json
 import numpy as np
 from enum import Enum
 
@@ -465,8 +464,8 @@ class OptimizedSearchService:
             SearchResponse with ranked and filtered results
         """
         search_id = f"hybrid_{int(time.time() * 1000)}"
-        start_time = time.time()
-        encoding_start = time.time()
+        start_time = time.perf_counter_ns()
+        encoding_start = start_time
         
         try:
             if not text_query and not image_data:
@@ -484,7 +483,7 @@ class OptimizedSearchService:
                 text_weight = 0.0
                 image_weight = 1.0
             
-            logger.info(f"Hybrid search - Text: {bool(text_query)}, Image: {bool(image_data)}")
+            logger.info("Hybrid search - Text: %s, Image: %s", bool(text_query), bool(image_data))
             
             # Generate embeddings
             embeddings = []
@@ -512,8 +511,8 @@ class OptimizedSearchService:
             else:
                 combined_embedding = embeddings[0]
             
-            encoding_time = time.time() - encoding_start
-            vector_search_start = time.time()
+            encoding_time = (time.perf_counter_ns() - encoding_start) / 1e9
+            vector_search_start = time.perf_counter_ns()
             
             # Build filter
             qdrant_filter = self._build_search_filter(search_filter) if search_filter else None
@@ -538,8 +537,8 @@ class OptimizedSearchService:
                 search_params=search_params
             )
             
-            vector_search_time = time.time() - vector_search_start
-            ranking_start = time.time()
+            vector_search_time = (time.perf_counter_ns() - vector_search_start) / 1e9
+            ranking_start = time.perf_counter_ns()
             
             # Apply ranking if configured
             if not ranking_config:
@@ -560,7 +559,7 @@ class OptimizedSearchService:
             # Apply pagination after ranking
             paginated_results = scored_results[offset:offset + limit]
             
-            ranking_time = time.time() - ranking_start
+            ranking_time = (time.perf_counter_ns() - ranking_start) / 1e9
             
             # Convert to Product objects
             products = []
@@ -588,7 +587,7 @@ class OptimizedSearchService:
                     logger.warning(f"Failed to parse product result: {e}")
                     continue
             
-            total_time = time.time() - start_time
+            total_time = (time.perf_counter_ns() - start_time) / 1e9
             
             # Log analytics
             metrics = SearchMetrics(
@@ -605,7 +604,7 @@ class OptimizedSearchService:
             )
             self.analytics.log_search(metrics)
             
-            logger.info(f"Hybrid search completed in {total_time:.3f}s, found {len(products)} products")
+            logger.info("Hybrid search completed in %.3fs, found %d products", total_time, len(products))
             
             return SearchResponse(
                 products=products,
@@ -638,9 +637,10 @@ class OptimizedSearchService:
             RuntimeError: If search fails
         """
         try:
-            logger.info(f"Advanced filter search: {request.text_query[:50] if request.text_query else 'No text query'}")
+            if logger.isEnabledFor(logging.INFO):
+                logger.info("Advanced filter search: %s", request.text_query[:50] if request.text_query else "No text query")
             
-            start_time = time.time()
+            start_time = time.perf_counter_ns()
             
             # Convert FilterRequest to SearchFilter
             search_filter = SearchFilter(
@@ -690,8 +690,8 @@ class OptimizedSearchService:
             # Generate aggregations
             aggregations = await self._generate_aggregations(response.products, request)
             
-            query_time = time.time() - start_time
-            logger.info(f"Advanced filter search completed in {query_time:.3f} seconds, found {len(response.products)} products")
+            query_time = (time.perf_counter_ns() - start_time) / 1e9
+            logger.info("Advanced filter search completed in %.3f seconds, found %d products", query_time, len(response.products))
             
             return {
                 "products": [product.__dict__ for product in response.products],
@@ -894,7 +894,7 @@ class OptimizedSearchService:
         Generate personalized search recommendations based on user behavior.
         """
         try:
-            logger.info(f"Generating recommendations for user: {user_id}")
+            logger.info("Generating recommendations for user: %s", user_id)
             
             # Get embeddings for recent searches
             search_embeddings = []
@@ -0,0 +1,48 @@
+"""
+Gunicorn configuration for production deployments
+
+    cd backend && gunicorn main:app
+
+Serves the FastAPI app from UvicornWorker processes so search and response
+encoding scale across cores. `python main.py` remains the development entry
+point with auto-reload.
+"""
+import gc
+import multiprocessing
+import os
+
+from uvicorn_worker import UvicornWorker
+
+
+class APIUvicornWorker(UvicornWorker):
+    """UvicornWorker with the uvicorn settings gunicorn has no option for
+    (gunicorn's own worker_connections is ignored by this worker class)"""
+
+    # Same in-flight cap as `python main.py`: overload sheds with 503s
+    # instead of connection resets
+    CONFIG_KWARGS = {
+        "loop": "auto",
+        "http": "auto",
+        "limit_concurrency": int(os.getenv("LIMIT_CONCURRENCY", 1000)),
+    }
+
+
+bind = f"0.0.0.0:{os.getenv('PORT', 8001)}"
+worker_class = APIUvicornWorker
+workers = int(os.getenv("WORKERS", multiprocessing.cpu_count() * 2))
+
+# Import the app once in the master: the product catalog and search index are
+# built before forking and shared copy-on-write by every worker
+preload_app = True
+
+backlog = 2048
+keepalive = 30
+graceful_timeout = 10
+loglevel = os.getenv("LOG_LEVEL", "info").lower()
+accesslog = "-"
+
+
+def when_ready(server):
+    """Freeze the preloaded objects out of GC tracking before workers fork, so
+    collections in the workers don't write to (and privately copy) their pages"""
+    gc.freeze()
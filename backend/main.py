@@ -5,28 +5,127 @@ Consolidated main server file with all features
 """
 from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import JSONResponse, Response
+from starlette.datastructures import MutableHeaders
 from pydantic import BaseModel
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Tuple
+from operator import itemgetter
+from collections import OrderedDict, deque
+from itertools import islice
+from functools import lru_cache, wraps
+from types import MappingProxyType
+from contextlib import asynccontextmanager
+from anyio import to_thread
+import numpy as np
 import uvicorn
 import logging
+from logging.handlers import QueueHandler, QueueListener
 import os
 import time
 import json
+import re
+import hashlib
+import heapq
+import bisect
+import queue
+import atexit
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    orjson = None
+    ORJSON_AVAILABLE = False
+
+try:
+    import uvloop
+    UVLOOP_AVAILABLE = True
+except ImportError:
+    uvloop = None
+    UVLOOP_AVAILABLE = False
+
+try:
+    import httptools
+    HTTPTOOLS_AVAILABLE = True
+except ImportError:
+    httptools = None
+    HTTPTOOLS_AVAILABLE = False
+
+try:
+    from brotli_asgi import BrotliMiddleware
+    BROTLI_AVAILABLE = True
+except ImportError:
+    BrotliMiddleware = None
+    BROTLI_AVAILABLE = False
+
+try:
+    import redis
+    import redis.asyncio
+    REDIS_AVAILABLE = True
+except ImportError:
+    redis = None
+    REDIS_AVAILABLE = False
+
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    njit = None
+    NUMBA_AVAILABLE = False
+
+class ORJSONAPIResponse(JSONResponse):
+    """JSONResponse rendered with orjson (FastAPI's own ORJSONResponse is
+    deprecated and warns on every instantiation)"""
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY)
+
+# Response class used for every JSON payload the API emits
+APIJSONResponse = ORJSONAPIResponse if ORJSON_AVAILABLE else JSONResponse
+
+# Configure logging: handlers only enqueue records and a listener thread formats
+# and writes them, so per-request logging never blocks the event loop on stream I/O
+_log_handler = logging.StreamHandler()
+_log_handler.setFormatter(logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s'))
+class _DeferredQueueHandler(QueueHandler):
+    """Enqueue records as-is: the queue never leaves this process, so message and
+    traceback formatting can wait for the listener thread"""
+
+    def prepare(self, record):
+        return record
+
+_queue_handler = _DeferredQueueHandler(queue.SimpleQueue())
+# LOG_LEVEL=WARNING in production skips per-request INFO records altogether
+logging.basicConfig(level=os.getenv("LOG_LEVEL", "INFO").upper(), handlers=[_queue_handler])
+
+def _start_log_listener():
+    """Start the thread that drains the log queue (threads do not survive fork,
+    and a forked child gets its own queue so pending parent records aren't replayed)"""
+    global _log_listener
+    _queue_handler.queue = queue.SimpleQueue()
+    _log_listener = QueueListener(_queue_handler.queue, _log_handler, respect_handler_level=True)
+    _log_listener.start()
+
+_start_log_listener()
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_start_log_listener)
+atexit.register(lambda: _log_listener.stop())
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
 logger = logging.getLogger(__name__)
 
+# Score accessors for building response score arrays (every result carries these keys)
+_get_score = itemgetter("score")
+_get_text_score = itemgetter("text_score")
+_get_visual_score = itemgetter("visual_score")
+
 # Request/Response Models
 class SearchRequest(BaseModel):
     query: str
     limit: Optional[int] = 10
     category: Optional[str] = None
     filters: Optional[Dict[str, Any]] = None
+    fields: Optional[List[str]] = None  # Return only these product fields (score is always kept)
 
 class VisualSearchRequest(BaseModel):
     image_url: Optional[str] = None
@@ -41,13 +140,25 @@ class MultimodalSearchRequest(BaseModel):
     limit: Optional[int] = 10
     category: Optional[str] = None
 
+# Worker threads available to sync endpoints/dependencies (anyio's default is 40)
+THREADPOOL_SIZE = int(os.getenv("THREADPOOL_SIZE", 200))
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Application lifespan: size the threadpool on the serving event loop"""
+    to_thread.current_default_thread_limiter().total_tokens = THREADPOOL_SIZE
+    _warm_scoring_kernels()
+    yield
+
 # Create FastAPI app
 app = FastAPI(
     title="Visual E-commerce Product Discovery API",
     description="High-performance multi-modal search API with advanced optimization features",
     version="2.1.0",
     docs_url="/docs",
-    redoc_url="/redoc"
+    redoc_url="/redoc",
+    default_response_class=APIJSONResponse,
+    lifespan=lifespan
 )
 
 # Simple performance tracking
@@ -55,60 +166,199 @@ request_metrics = {
     "total_requests": 0,
     "active_requests": 0,
     "errors": 0,
-    "response_times": []
+    "response_times": deque(maxlen=100),  # Last 100 response times, oldest dropped on append
+    "recent_response_times": deque(maxlen=10),  # Averaging window for avg_response_time
+    "recent_response_time_sum": 0.0,  # Running sum of recent_response_times
+    "requests_by_route": {}
 }
 
-# Performance middleware
-@app.middleware("http")
-async def performance_middleware(request: Request, call_next):
+# Label for requests no route matched (404s), so scans of arbitrary URLs
+# don't create a new series per path
+UNMATCHED_ROUTE = "<unmatched>"
+
+# Fixed part of the 500 envelope shared by the middleware and exception handler
+INTERNAL_ERROR_FIELDS = {
+    "error": "internal_server_error",
+    "message": "An unexpected error occurred"
+}
+
+# Exception class names reveal implementation details; they stay in the logs
+# but only reach clients outside production
+EXPOSE_ERROR_DETAILS = os.getenv("ENVIRONMENT", "development") != "production"
+
+# Performance middleware (pure ASGI: no BaseHTTPMiddleware task group or body buffering)
+class PerformanceMiddleware:
     """Performance monitoring middleware"""
-    start_time = time.time()
-    method = request.method
-    endpoint = str(request.url.path)
-    
-    # Track request start
-    request_metrics["active_requests"] += 1
-    request_metrics["total_requests"] += 1
-    
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start_time = time.perf_counter()
+        method = scope["method"]
+        endpoint = scope["path"]
+        response_started = False
+
+        # Track request start
+        request_metrics["active_requests"] += 1
+        request_metrics["total_requests"] += 1
+
+        async def send_with_metrics(message):
+            nonlocal response_started
+            if message["type"] == "http.response.start":
+                response_started = True
+
+                # Record successful request
+                processing_time = time.perf_counter() - start_time
+                request_metrics["response_times"].append(processing_time)
+
+                # Slide the averaging window, keeping its sum up to date
+                recent = request_metrics["recent_response_times"]
+                if len(recent) == recent.maxlen:
+                    request_metrics["recent_response_time_sum"] -= recent[0]
+                recent.append(processing_time)
+                request_metrics["recent_response_time_sum"] += processing_time
+
+                # Count per route template (e.g. /api/products/{id}), not per raw path
+                route = scope.get("route")
+                route_label = route.path if route is not None else UNMATCHED_ROUTE
+                by_route = request_metrics["requests_by_route"]
+                by_route[route_label] = by_route.get(route_label, 0) + 1
+
+                # Add performance headers
+                headers = MutableHeaders(scope=message)
+                headers["X-Process-Time"] = format(processing_time, ".6f")
+                headers["X-API-Version"] = "2.1.0"
+
+                # Lazy %-formatting: skipped entirely when INFO is disabled
+                logger.info("%s %s - %d - %.3fs", method, endpoint, message["status"], processing_time)
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_metrics)
+
+        except Exception as e:
+            # Record failed request
+            processing_time = time.perf_counter() - start_time
+            request_metrics["errors"] += 1
+
+            logger.error("Request processing error: %s", e)
+
+            # Headers already went out; nothing left to replace
+            if response_started:
+                raise
+
+            response = APIJSONResponse(
+                status_code=500,
+                content={
+                    **INTERNAL_ERROR_FIELDS,
+                    "path": endpoint,
+                    "method": method,
+                    "processing_time": processing_time
+                }
+            )
+            await response(scope, receive, send)
+        finally:
+            # Track request end
+            request_metrics["active_requests"] -= 1
+
+app.add_middleware(PerformanceMiddleware)
+
+# Search result cache: identical request bodies produce identical results,
+# so repeat queries are answered from an in-process LRU
+SEARCH_CACHE_SIZE = 256
+_search_cache: "OrderedDict[bytes, Dict[str, Any]]" = OrderedDict()
+
+def _search_cache_key(endpoint: str, request: BaseModel) -> bytes:
+    """Build a fixed-size cache key from the endpoint and a digest of the canonical
+    request body (bodies can carry base64 images, which must not live on as keys)"""
+    if ORJSON_AVAILABLE:
+        body = orjson.dumps(request.model_dump(), option=orjson.OPT_SORT_KEYS, default=str)
+    else:
+        body = json.dumps(request.model_dump(), sort_keys=True, default=str).encode()
+    return endpoint.encode() + b":" + hashlib.blake2b(body, digest_size=16).digest()
+
+def _search_cache_get(key: bytes) -> Optional[Dict[str, Any]]:
+    """Return a cached search response and mark it as recently used"""
+    result = _search_cache.get(key)
+    if result is not None:
+        _search_cache.move_to_end(key)
+    return result
+
+def _search_cache_put(key: bytes, result: Dict[str, Any]) -> Dict[str, Any]:
+    """Store a search response, evicting the least recently used entry when full"""
+    _search_cache[key] = result
+    _search_cache.move_to_end(key)
+    if len(_search_cache) > SEARCH_CACHE_SIZE:
+        _search_cache.popitem(last=False)
+    return result
+
+# Shared tier: with REDIS_URL set, serialized search responses are also kept in
+# Redis so every worker process (and repeat queries after an LRU eviction) can
+# answer with a single GET
+SEARCH_REDIS_URL = os.getenv("REDIS_URL")
+SEARCH_SHARED_CACHE_TTL_SECONDS = int(os.getenv("SEARCH_CACHE_TTL", 60))
+_shared_search_cache = (
+    redis.asyncio.from_url(SEARCH_REDIS_URL, socket_timeout=0.1, socket_connect_timeout=0.1)
+    if REDIS_AVAILABLE and SEARCH_REDIS_URL else None
+)
+
+# After a Redis error the shared tier is skipped for this long, so an outage
+# costs one timeout and one warning per window instead of one per search
+SEARCH_SHARED_CACHE_COOLDOWN_SECONDS = float(os.getenv("SEARCH_CACHE_COOLDOWN", 30))
+_shared_cache_retry_at = 0.0
+
+def _shared_cache_key(key: bytes) -> bytes:
+    """Redis key for a search cache key (already fixed-size, so no second hash)"""
+    return b"s:" + key
+
+def _shared_cache_client():
+    """Redis client for the shared tier, or None if unconfigured or cooling down"""
+    if _shared_search_cache is None or time.monotonic() < _shared_cache_retry_at:
+        return None
+    return _shared_search_cache
+
+def _shared_cache_failed(operation: str, error: Exception) -> None:
+    """Start a cooldown after a Redis error (warning once per cooldown window)"""
+    global _shared_cache_retry_at
+    if time.monotonic() >= _shared_cache_retry_at:
+        logger.warning("Search cache %s failed, skipping Redis for %.0fs: %s",
+                       operation, SEARCH_SHARED_CACHE_COOLDOWN_SECONDS, error)
+    _shared_cache_retry_at = time.monotonic() + SEARCH_SHARED_CACHE_COOLDOWN_SECONDS
+
+async def _shared_cache_get(key: bytes) -> Optional[bytes]:
+    """Serialized search response from Redis; failures are treated as a miss"""
+    client = _shared_cache_client()
+    if client is None:
+        return None
     try:
-        response = await call_next(request)
-        
-        # Record successful request
-        processing_time = time.time() - start_time
-        request_metrics["response_times"].append(processing_time)
-        
-        # Keep only last 100 response times for averaging
-        if len(request_metrics["response_times"]) > 100:
-            request_metrics["response_times"] = request_metrics["response_times"][-100:]
-        
-        # Add performance headers
-        response.headers["X-Process-Time"] = str(processing_time)
-        response.headers["X-API-Version"] = "2.1.0"
-        
-        logger.info(f"{method} {endpoint} - {response.status_code} - {processing_time:.3f}s")
-        
-        return response
-        
-    except Exception as e:
-        # Record failed request
-        processing_time = time.time() - start_time
-        request_metrics["errors"] += 1
-        
-        logger.error(f"Request processing error: {e}")
-        
-        return JSONResponse(
-            status_code=500,
-            content={
-                "error": "internal_server_error",
-                "message": "An unexpected error occurred",
-                "path": endpoint,
-                "method": method,
-                "processing_time": processing_time
-            }
-        )
-    finally:
-        # Track request end
-        request_metrics["active_requests"] -= 1
+        return await client.get(_shared_cache_key(key))
+    except redis.RedisError as e:
+        _shared_cache_failed("read", e)
+        return None
+
+async def _search_response(key: bytes, result: Dict[str, Any]) -> Response:
+    """Cache a computed search response in both tiers and return it"""
+    response = APIJSONResponse(_search_cache_put(key, result))
+    client = _shared_cache_client()
+    if client is not None:
+        try:
+            await client.setex(_shared_cache_key(key), SEARCH_SHARED_CACHE_TTL_SECONDS, response.body)
+        except redis.RedisError as e:
+            _shared_cache_failed("write", e)
+    return response
+
+def _project_products(products: List[Dict[str, Any]], fields: Optional[List[str]]) -> List[Dict[str, Any]]:
+    """Trim product dicts to the requested fields so summary clients get smaller payloads"""
+    if not fields:
+        return products
+    keep = set(fields)
+    keep.add("score")
+    return [{key: value for key, value in product.items() if key in keep} for product in products]
 
 # CORS middleware
 app.add_middleware(
@@ -117,219 +367,591 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    max_age=86400,  # Let browsers reuse preflight results for a day
+)
+
+# Compress large JSON payloads (product lists, search results): Brotli when the
+# client accepts it (falling back to gzip itself), plain GZip otherwise.
+# Quality 4 keeps Brotli's CPU cost near gzip's while compressing JSON better.
+if BROTLI_AVAILABLE:
+    app.add_middleware(BrotliMiddleware, minimum_size=500, quality=4, gzip_fallback=True)
+else:
+    app.add_middleware(GZipMiddleware, minimum_size=500, compresslevel=5)
+
+# Comprehensive product database (module constant: handlers copy a product
+# before attaching scores and never mutate these dicts)
+# Read-only catalog: a tuple of mapping proxies, so request handlers can't
+# mutate shared products (responses are built from dict(product) copies)
+CATALOG_PRODUCTS = tuple(MappingProxyType(product) for product in [
+    # Footwear products
+    {
+        "id": "nike_air_1",
+        "name": "Nike Air Max 90 Running Shoes",
+        "description": "Classic Nike running shoes with air cushioning technology. Perfect for daily runs and casual wear.",
+        "price": 129.99,
+        "category": "footwear",
+        "image_url": "https://images.unsplash.com/photo-1542291026-7eec264c27ff?w=400",
+        "brand": "Nike",
+        "tags": ["running", "athletic", "casual", "footwear"],
+        "color": "white",
+        "size": ["7", "8", "9", "10", "11", "12"],
+        "rating": 4.5,
+        "reviews": 1250
+    },
+    {
+        "id": "adidas_ultra_1",
+        "name": "Adidas UltraBoost 22 Sneakers",
+        "description": "Premium Adidas sneakers with Boost technology for maximum comfort and energy return.",
+        "price": 189.99,
+        "category": "footwear",
+        "image_url": "https://images.unsplash.com/photo-1549298916-b41d501d3772?w=400",
+        "brand": "Adidas",
+        "tags": ["sneakers", "boost", "comfort", "footwear"],
+        "color": "black",
+        "size": ["7", "8", "9", "10", "11", "12"],
+        "rating": 4.7,
+        "reviews": 980
+    },
+    {
+        "id": "converse_chuck_1",
+        "name": "Converse Chuck Taylor All Star",
+        "description": "Classic canvas sneakers that never go out of style. Perfect for casual everyday wear.",
+        "price": 65.99,
+        "category": "footwear",
+        "image_url": "https://images.unsplash.com/photo-1605348532760-6753d2c43329?w=400",
+        "brand": "Converse",
+        "tags": ["canvas", "classic", "casual", "footwear"],
+        "color": "red",
+        "size": ["6", "7", "8", "9", "10", "11"],
+        "rating": 4.3,
+        "reviews": 2100
+    },
+    {
+        "id": "boots_hiking_1",
+        "name": "Waterproof Hiking Boots",
+        "description": "Durable waterproof hiking boots designed for outdoor adventures and tough terrains.",
+        "price": 159.99,
+        "category": "footwear",
+        "image_url": "https://images.unsplash.com/photo-1544966503-7cc5ac882d5f?w=400",
+        "brand": "OutdoorGear",
+        "tags": ["hiking", "waterproof", "outdoor", "footwear"],
+        "color": "brown",
+        "size": ["8", "9", "10", "11", "12", "13"],
+        "rating": 4.6,
+        "reviews": 650
+    },
+    {
+        "id": "sandals_summer_1",
+        "name": "Comfortable Summer Sandals",
+        "description": "Lightweight and comfortable sandals perfect for summer days and beach walks.",
+        "price": 45.99,
+        "category": "footwear",
+        "image_url": "https://images.unsplash.com/photo-1603487742131-4160ec999306?w=400",
+        "brand": "SummerStyle",
+        "tags": ["sandals", "summer", "beach", "footwear"],
+        "color": "tan",
+        "size": ["6", "7", "8", "9", "10", "11"],
+        "rating": 4.2,
+        "reviews": 450
+    },
+    # Electronics
+    {
+        "id": "iphone_15",
+        "name": "iPhone 15 Pro Max",
+        "description": "Latest iPhone with advanced camera system and A17 Pro chip. Features titanium design and improved battery life.",
+        "price": 1199.99,
+        "category": "electronics",
+        "image_url": "https://images.unsplash.com/photo-1592750475338-74b7b21085ab?w=400",
+        "brand": "Apple",
+        "tags": ["smartphone", "iPhone", "camera", "electronics"],
+        "color": "blue",
+        "storage": ["128GB", "256GB", "512GB", "1TB"],
+        "rating": 4.8,
+        "reviews": 3200
+    },
+    {
+        "id": "samsung_galaxy_1",
+        "name": "Samsung Galaxy S24 Ultra",
+        "description": "Premium Android smartphone with S Pen and advanced photography features.",
+        "price": 1099.99,
+        "category": "electronics",
+        "image_url": "https://images.unsplash.com/photo-1511707171634-5f897ff02aa9?w=400",
+        "brand": "Samsung",
+        "tags": ["smartphone", "android", "camera", "electronics"],
+        "color": "black",
+        "storage": ["256GB", "512GB", "1TB"],
+        "rating": 4.6,
+        "reviews": 2800
+    },
+    {
+        "id": "macbook_air_1",
+        "name": "MacBook Air M3",
+        "description": "Ultra-thin laptop with M3 chip for incredible performance and all-day battery life.",
+        "price": 1299.99,
+        "category": "electronics",
+        "image_url": "https://images.unsplash.com/photo-1517336714731-489689fd1ca8?w=400",
+        "brand": "Apple",
+        "tags": ["laptop", "macbook", "portable", "electronics"],
+        "color": "silver",
+        "storage": ["256GB", "512GB", "1TB"],
+        "rating": 4.7,
+        "reviews": 1850
+    },
+    # Clothing
+    {
+        "id": "jacket_winter_1",
+        "name": "Insulated Winter Jacket",
+        "description": "Warm and stylish winter jacket with premium insulation for cold weather protection.",
+        "price": 189.99,
+        "category": "clothing",
+        "image_url": "https://images.unsplash.com/photo-1551698618-1dfe5d97d256?w=400",
+        "brand": "WinterWear",
+        "tags": ["jacket", "winter", "warm", "clothing"],
+        "color": "navy",
+        "size": ["S", "M", "L", "XL", "XXL"],
+        "rating": 4.4,
+        "reviews": 720
+    },
+    {
+        "id": "dress_summer_1",
+        "name": "Floral Summer Dress",
+        "description": "Light and breezy summer dress with beautiful floral pattern, perfect for warm days.",
+        "price": 79.99,
+        "category": "clothing",
+        "image_url": "https://images.unsplash.com/photo-1595777457583-95e059d581b8?w=400",
+        "brand": "SummerFashion",
+        "tags": ["dress", "summer", "floral", "clothing"],
+        "color": "multicolor",
+        "size": ["XS", "S", "M", "L", "XL"],
+        "rating": 4.5,
+        "reviews": 890
+    },
+    {
+        "id": "jeans_classic_1",
+        "name": "Classic Blue Jeans",
+        "description": "Timeless straight-leg jeans in classic blue denim. Comfortable fit for everyday wear.",
+        "price": 89.99,
+        "category": "clothing",
+        "image_url": "https://images.unsplash.com/photo-1582418702059-97ebafb35d09?w=400",
+        "brand": "DenimCo",
+        "tags": ["jeans", "denim", "casual", "clothing"],
+        "color": "blue",
+        "size": ["28", "30", "32", "34", "36", "38"],
+        "rating": 4.3,
+        "reviews": 1540
+    },
+    # Accessories
+    {
+        "id": "watch_sport_1",
+        "name": "Smart Sports Watch",
+        "description": "Advanced fitness tracker with heart rate monitoring, GPS, and smartphone connectivity.",
+        "price": 299.99,
+        "category": "accessories",
+        "image_url": "https://images.unsplash.com/photo-1523275335684-37898b6baf30?w=400",
+        "brand": "SportsTech",
+        "tags": ["watch", "sports", "fitness", "accessories"],
+        "color": "black",
+        "features": ["GPS", "Heart Rate", "Waterproof", "Bluetooth"],
+        "rating": 4.5,
+        "reviews": 950
+    },
+    {
+        "id": "bag_leather_1",
+        "name": "Premium Leather Handbag",
+        "description": "Elegant leather handbag with multiple compartments and adjustable strap.",
+        "price": 159.99,
+        "category": "accessories",
+        "image_url": "https://images.unsplash.com/photo-1584917865442-de89df76afd3?w=400",
+        "brand": "LeatherCraft",
+        "tags": ["bag", "leather", "handbag", "accessories"],
+        "color": "brown",
+        "material": "genuine leather",
+        "rating": 4.6,
+        "reviews": 680
+    },
+    {
+        "id": "sunglasses_1",
+        "name": "Polarized Sunglasses",
+        "description": "Stylish polarized sunglasses with UV protection and durable frame.",
+        "price": 89.99,
+        "category": "accessories",
+        "image_url": "https://images.unsplash.com/photo-1572635196237-14b3f281503f?w=400",
+        "brand": "SunStyle",
+        "tags": ["sunglasses", "polarized", "UV protection", "accessories"],
+        "color": "black",
+        "features": ["UV Protection", "Polarized", "Scratch Resistant"],
+        "rating": 4.4,
+        "reviews": 520
+    }
+])
+
+# Fields every catalog product carries, so hot paths can subscript instead of
+# using .get() with defaults; "size" only applies to wearables and stays optional
+REQUIRED_PRODUCT_FIELDS = (
+    "id", "name", "description", "price", "category", "image_url",
+    "brand", "tags", "color", "rating", "reviews"
 )
 
-# Comprehensive product database
+def _validate_catalog(products: List[Dict[str, Any]]) -> None:
+    """Fail at import if a product is missing a required field"""
+    for product in products:
+        missing = [field for field in REQUIRED_PRODUCT_FIELDS if field not in product]
+        if missing:
+            raise ValueError(f"Product {product.get('id')!r} is missing fields: {', '.join(missing)}")
+
+_validate_catalog(CATALOG_PRODUCTS)
+
 def get_all_products():
     """Get comprehensive product database"""
-    return [
-        # Footwear products
-        {
-            "id": "nike_air_1",
-            "name": "Nike Air Max 90 Running Shoes",
-            "description": "Classic Nike running shoes with air cushioning technology. Perfect for daily runs and casual wear.",
-            "price": 129.99,
-            "category": "footwear",
-            "image_url": "https://images.unsplash.com/photo-1542291026-7eec264c27ff?w=400",
-            "brand": "Nike",
-            "tags": ["running", "athletic", "casual", "footwear"],
-            "color": "white",
-            "size": ["7", "8", "9", "10", "11", "12"],
-            "rating": 4.5,
-            "reviews": 1250
-        },
-        {
-            "id": "adidas_ultra_1",
-            "name": "Adidas UltraBoost 22 Sneakers",
-            "description": "Premium Adidas sneakers with Boost technology for maximum comfort and energy return.",
-            "price": 189.99,
-            "category": "footwear",
-            "image_url": "https://images.unsplash.com/photo-1549298916-b41d501d3772?w=400",
-            "brand": "Adidas",
-            "tags": ["sneakers", "boost", "comfort", "footwear"],
-            "color": "black",
-            "size": ["7", "8", "9", "10", "11", "12"],
-            "rating": 4.7,
-            "reviews": 980
-        },
-        {
-            "id": "converse_chuck_1",
-            "name": "Converse Chuck Taylor All Star",
-            "description": "Classic canvas sneakers that never go out of style. Perfect for casual everyday wear.",
-            "price": 65.99,
-            "category": "footwear",
-            "image_url": "https://images.unsplash.com/photo-1605348532760-6753d2c43329?w=400",
-            "brand": "Converse",
-            "tags": ["canvas", "classic", "casual", "footwear"],
-            "color": "red",
-            "size": ["6", "7", "8", "9", "10", "11"],
-            "rating": 4.3,
-            "reviews": 2100
-        },
-        {
-            "id": "boots_hiking_1",
-            "name": "Waterproof Hiking Boots",
-            "description": "Durable waterproof hiking boots designed for outdoor adventures and tough terrains.",
-            "price": 159.99,
-            "category": "footwear",
-            "image_url": "https://images.unsplash.com/photo-1544966503-7cc5ac882d5f?w=400",
-            "brand": "OutdoorGear",
-            "tags": ["hiking", "waterproof", "outdoor", "footwear"],
-            "color": "brown",
-            "size": ["8", "9", "10", "11", "12", "13"],
-            "rating": 4.6,
-            "reviews": 650
-        },
-        {
-            "id": "sandals_summer_1",
-            "name": "Comfortable Summer Sandals",
-            "description": "Lightweight and comfortable sandals perfect for summer days and beach walks.",
-            "price": 45.99,
-            "category": "footwear",
-            "image_url": "https://images.unsplash.com/photo-1603487742131-4160ec999306?w=400",
-            "brand": "SummerStyle",
-            "tags": ["sandals", "summer", "beach", "footwear"],
-            "color": "tan",
-            "size": ["6", "7", "8", "9", "10", "11"],
-            "rating": 4.2,
-            "reviews": 450
-        },
-        # Electronics
-        {
-            "id": "iphone_15",
-            "name": "iPhone 15 Pro Max",
-            "description": "Latest iPhone with advanced camera system and A17 Pro chip. Features titanium design and improved battery life.",
-            "price": 1199.99,
-            "category": "electronics",
-            "image_url": "https://images.unsplash.com/photo-1592750475338-74b7b21085ab?w=400",
-            "brand": "Apple",
-            "tags": ["smartphone", "iPhone", "camera", "electronics"],
-            "color": "blue",
-            "storage": ["128GB", "256GB", "512GB", "1TB"],
-            "rating": 4.8,
-            "reviews": 3200
-        },
-        {
-            "id": "samsung_galaxy_1",
-            "name": "Samsung Galaxy S24 Ultra",
-            "description": "Premium Android smartphone with S Pen and advanced photography features.",
-            "price": 1099.99,
-            "category": "electronics",
-            "image_url": "https://images.unsplash.com/photo-1511707171634-5f897ff02aa9?w=400",
-            "brand": "Samsung",
-            "tags": ["smartphone", "android", "camera", "electronics"],
-            "color": "black",
-            "storage": ["256GB", "512GB", "1TB"],
-            "rating": 4.6,
-            "reviews": 2800
-        },
-        {
-            "id": "macbook_air_1",
-            "name": "MacBook Air M3",
-            "description": "Ultra-thin laptop with M3 chip for incredible performance and all-day battery life.",
-            "price": 1299.99,
-            "category": "electronics",
-            "image_url": "https://images.unsplash.com/photo-1517336714731-489689fd1ca8?w=400",
-            "brand": "Apple",
-            "tags": ["laptop", "macbook", "portable", "electronics"],
-            "color": "silver",
-            "storage": ["256GB", "512GB", "1TB"],
-            "rating": 4.7,
-            "reviews": 1850
-        },
-        # Clothing
-        {
-            "id": "jacket_winter_1",
-            "name": "Insulated Winter Jacket",
-            "description": "Warm and stylish winter jacket with premium insulation for cold weather protection.",
-            "price": 189.99,
-            "category": "clothing",
-            "image_url": "https://images.unsplash.com/photo-1551698618-1dfe5d97d256?w=400",
-            "brand": "WinterWear",
-            "tags": ["jacket", "winter", "warm", "clothing"],
-            "color": "navy",
-            "size": ["S", "M", "L", "XL", "XXL"],
-            "rating": 4.4,
-            "reviews": 720
-        },
-        {
-            "id": "dress_summer_1",
-            "name": "Floral Summer Dress",
-            "description": "Light and breezy summer dress with beautiful floral pattern, perfect for warm days.",
-            "price": 79.99,
-            "category": "clothing",
-            "image_url": "https://images.unsplash.com/photo-1595777457583-95e059d581b8?w=400",
-            "brand": "SummerFashion",
-            "tags": ["dress", "summer", "floral", "clothing"],
-            "color": "multicolor",
-            "size": ["XS", "S", "M", "L", "XL"],
-            "rating": 4.5,
-            "reviews": 890
-        },
-        {
-            "id": "jeans_classic_1",
-            "name": "Classic Blue Jeans",
-            "description": "Timeless straight-leg jeans in classic blue denim. Comfortable fit for everyday wear.",
-            "price": 89.99,
-            "category": "clothing",
-            "image_url": "https://images.unsplash.com/photo-1582418702059-97ebafb35d09?w=400",
-            "brand": "DenimCo",
-            "tags": ["jeans", "denim", "casual", "clothing"],
-            "color": "blue",
-            "size": ["28", "30", "32", "34", "36", "38"],
-            "rating": 4.3,
-            "reviews": 1540
-        },
-        # Accessories
-        {
-            "id": "watch_sport_1",
-            "name": "Smart Sports Watch",
-            "description": "Advanced fitness tracker with heart rate monitoring, GPS, and smartphone connectivity.",
-            "price": 299.99,
-            "category": "accessories",
-            "image_url": "https://images.unsplash.com/photo-1523275335684-37898b6baf30?w=400",
-            "brand": "SportsTech",
-            "tags": ["watch", "sports", "fitness", "accessories"],
-            "color": "black",
-            "features": ["GPS", "Heart Rate", "Waterproof", "Bluetooth"],
-            "rating": 4.5,
-            "reviews": 950
-        },
-        {
-            "id": "bag_leather_1",
-            "name": "Premium Leather Handbag",
-            "description": "Elegant leather handbag with multiple compartments and adjustable strap.",
-            "price": 159.99,
-            "category": "accessories",
-            "image_url": "https://images.unsplash.com/photo-1584917865442-de89df76afd3?w=400",
-            "brand": "LeatherCraft",
-            "tags": ["bag", "leather", "handbag", "accessories"],
-            "color": "brown",
-            "material": "genuine leather",
-            "rating": 4.6,
-            "reviews": 680
-        },
-        {
-            "id": "sunglasses_1",
-            "name": "Polarized Sunglasses",
-            "description": "Stylish polarized sunglasses with UV protection and durable frame.",
-            "price": 89.99,
-            "category": "accessories",
-            "image_url": "https://images.unsplash.com/photo-1572635196237-14b3f281503f?w=400",
-            "brand": "SunStyle",
-            "tags": ["sunglasses", "polarized", "UV protection", "accessories"],
-            "color": "black",
-            "features": ["UV Protection", "Polarized", "Scratch Resistant"],
-            "rating": 4.4,
-            "reviews": 520
+    return CATALOG_PRODUCTS
+
+# Catalog as a struct of arrays, built once at import: lowercased match fields
+# and numeric columns for vectorized filtering and scoring, plus an inverted
+# index from word tokens (and from character trigrams) to catalog positions
+_TOKEN_RE = re.compile(r"\w+")
+
+def _lowered_fields(product: Dict[str, Any]) -> Dict[str, Any]:
+    """Lowercased match fields for one product"""
+    return {
+        "text": f"{product['name']} {product['description']} {product['category']} {product['brand']} {' '.join(product['tags'])}".lower(),
+        "name": product["name"].lower(),
+        "description": product["description"].lower(),
+        "category": product["category"].lower(),
+        "brand": product["brand"].lower(),
+        "color": product["color"].lower(),
+        "tags": frozenset(tag.lower() for tag in product["tags"]),
+    }
+
+def _build_search_index(products: List[Dict[str, Any]]):
+    """Precompute lowercased fields (per product id), the catalog columns and
+    the token/trigram -> positions maps"""
+    fields = [_lowered_fields(product) for product in products]
+    token_index: Dict[str, set] = {}
+    trigram_index: Dict[str, set] = {}
+    for position, product_fields in enumerate(fields):
+        searchable_text = product_fields["text"]
+        for token in _TOKEN_RE.findall(searchable_text):
+            token_index.setdefault(token, set()).add(position)
+        for i in range(len(searchable_text) - 2):
+            trigram_index.setdefault(searchable_text[i:i + 3], set()).add(position)
+    columns = {
+        key: np.array([product_fields[key] for product_fields in fields], dtype=str)
+        for key in ("text", "name", "description", "category", "brand", "color")
+    }
+    columns["tags"] = [product_fields["tags"] for product_fields in fields]
+    columns["price"] = np.array([p["price"] for p in products], dtype=np.float64)
+    columns["rating"] = np.array([p["rating"] for p in products], dtype=np.float64)
+    columns["reviews"] = np.array([p["reviews"] for p in products], dtype=np.float64)
+    columns["sizes"] = [p.get("size", []) for p in products]
+    # Highly rated products get a fixed relevance boost
+    columns["rating_boost"] = np.where(columns["rating"] >= 4.5, 0.1, 0.0)
+    fields_by_id = {product["id"]: product_fields for product, product_fields in zip(products, fields)}
+    return columns, fields_by_id, token_index, trigram_index
+
+_CATALOG, _SEARCH_FIELDS, _TOKEN_INDEX, _TRIGRAM_INDEX = _build_search_index(CATALOG_PRODUCTS)
+
+def _group_by_category(products: List[Dict[str, Any]]) -> Dict[str, List[Dict[str, Any]]]:
+    """Products grouped by lowercased category, each group in catalog order"""
+    by_category = {}
+    for product in products:
+        by_category.setdefault(_SEARCH_FIELDS[product["id"]]["category"], []).append(product)
+    return by_category
+
+_PRODUCTS_BY_CATEGORY = {
+    category: tuple(products) for category, products in _group_by_category(CATALOG_PRODUCTS).items()
+}
+_POSITIONS_BY_CATEGORY = {
+    category: np.flatnonzero(_CATALOG["category"] == category) for category in _PRODUCTS_BY_CATEGORY
+}
+_ALL_POSITIONS = np.arange(len(CATALOG_PRODUCTS))
+_NO_POSITIONS = np.zeros(0, dtype=np.intp)
+for _positions in (*_POSITIONS_BY_CATEGORY.values(), _ALL_POSITIONS, _NO_POSITIONS):
+    _positions.flags.writeable = False
+
+def _category_positions(category_filter: Optional[str]) -> np.ndarray:
+    """Catalog positions in the (case-insensitive) category; all positions without a filter"""
+    if not category_filter:
+        return _ALL_POSITIONS
+    return _POSITIONS_BY_CATEGORY.get(category_filter.lower(), _NO_POSITIONS)
+
+def _bitmask_index(values_per_product: List[Any]) -> Dict[Any, int]:
+    """Map each attribute value to a bitmask of the catalog positions that have it"""
+    masks = {}
+    for position, values in enumerate(values_per_product):
+        for value in values:
+            masks[value] = masks.get(value, 0) | (1 << position)
+    return masks
+
+# Categorical filters as position bitmasks: a multi-attribute filter is an
+# AND of ORs over plain ints, decoded to positions once at the end
+_ALL_MASK = (1 << len(CATALOG_PRODUCTS)) - 1
+_CATEGORY_MASKS = _bitmask_index([(category,) for category in _CATALOG["category"].tolist()])
+_BRAND_MASKS = _bitmask_index([(product["brand"],) for product in CATALOG_PRODUCTS])
+_COLOR_MASKS = _bitmask_index([(color,) for color in _CATALOG["color"].tolist()])
+_SIZE_MASKS = _bitmask_index(_CATALOG["sizes"])
+
+def _any_of_mask(masks: Dict[Any, int], values: List[Any]) -> int:
+    """Positions having any of the values (attribute values are all strings)"""
+    mask = 0
+    for value in values:
+        if isinstance(value, str):
+            mask |= masks.get(value, 0)
+    return mask
+
+def _mask_positions(mask: int) -> np.ndarray:
+    """Catalog positions of the set bits, in ascending order"""
+    positions = []
+    while mask:
+        lowest = mask & -mask
+        positions.append(lowest.bit_length() - 1)
+        mask ^= lowest
+    return np.array(positions, dtype=np.intp)
+
+def _available_filters(products: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Brand, color and price options offered for a set of products"""
+    return {
+        "brands": list(set(p["brand"] for p in products)),
+        "colors": list(set(p["color"] for p in products if p["color"])),
+        "price_range": {
+            "min": min(p["price"] for p in products) if products else 0,
+            "max": max(p["price"] for p in products) if products else 0
         }
-    ]
+    }
+
+def _build_available_filters_by_category(products: List[Dict[str, Any]]) -> Dict[Optional[str], Dict[str, Any]]:
+    """Filter options per lowercased category, with the whole catalog under None"""
+    table = {category: _available_filters(members) for category, members in _group_by_category(products).items()}
+    table[None] = _available_filters(products)
+    return table
+
+_AVAILABLE_FILTERS_BY_CATEGORY = _build_available_filters_by_category(CATALOG_PRODUCTS)
+_NO_AVAILABLE_FILTERS = _available_filters([])
+
+# Advanced filters that narrow results beyond the category
+_NARROWING_FILTERS = frozenset(("price_min", "price_max", "brand", "color", "rating_min", "size"))
+
+@lru_cache(maxsize=1024)
+def _match_positions(query: str) -> tuple:
+    """Catalog positions whose searchable text contains the (lowercased) query.
+
+    A single-word query can only occur inside one token, so the union of the
+    postings of every token containing it is exactly the substring match set.
+    Other queries intersect the postings of their trigrams and verify the few
+    remaining candidates. Queries too short to have a trigram scan the text column.
+    """
+    if _TOKEN_RE.fullmatch(query):
+        positions = set()
+        for token, token_positions in _TOKEN_INDEX.items():
+            if query in token:
+                positions |= token_positions
+        return tuple(sorted(positions))
+    if len(query) < 3:
+        return tuple(np.flatnonzero(np.char.find(_CATALOG["text"], query) >= 0).tolist())
+    postings = sorted((_TRIGRAM_INDEX.get(query[i:i + 3], ()) for i in range(len(query) - 2)), key=len)
+    candidates = set(postings[0]).intersection(*postings[1:])
+    texts = _CATALOG["text"]
+    return tuple(sorted(position for position in candidates if query in texts[position]))
+
+def _text_match_mask(query: str) -> np.ndarray:
+    """Boolean mask over the catalog of products whose searchable text contains the query"""
+    mask = np.zeros(len(CATALOG_PRODUCTS), dtype=bool)
+    mask[list(_match_positions(query))] = True
+    return mask
+
+# Scored fields concatenated product-major into one NUL-separated string, so a
+# query is located in every field by a single left-to-right scan
+_SCORED_FIELDS = ("name", "description", "category", "brand")
+_SCORED_FIELD_INDEX = {field: i for i, field in enumerate(_SCORED_FIELDS)}
+_FIELD_SEPARATOR = "\x00"
+
+def _build_field_blob(columns: Dict[str, Any]) -> Tuple[str, List[int]]:
+    """Concatenated scored-field text and the start offset of each field segment"""
+    segments = [str(value) for row in zip(*(columns[field] for field in _SCORED_FIELDS)) for value in row]
+    starts = []
+    offset = 0
+    for segment in segments:
+        starts.append(offset)
+        offset += len(segment) + 1
+    return _FIELD_SEPARATOR.join(segments), starts
+
+_FIELD_BLOB, _FIELD_STARTS = _build_field_blob(_CATALOG)
+
+@lru_cache(maxsize=1024)
+def _field_hits(query: str) -> np.ndarray:
+    """Read-only (product x scored field) matrix of which fields contain the query.
+
+    Each match jumps the scan to the next segment, so the blob is read once
+    no matter how many fields hit."""
+    if _FIELD_SEPARATOR in query:
+        # Could span segments in the blob; test the fields individually
+        hits = np.column_stack([np.char.find(_CATALOG[field], query) >= 0 for field in _SCORED_FIELDS])
+    else:
+        hits = np.zeros(len(_FIELD_STARTS), dtype=bool)
+        pos = _FIELD_BLOB.find(query)
+        while pos != -1:
+            segment = bisect.bisect_right(_FIELD_STARTS, pos) - 1
+            hits[segment] = True
+            if segment + 1 == len(_FIELD_STARTS):
+                break
+            pos = _FIELD_BLOB.find(query, _FIELD_STARTS[segment + 1])
+        hits = hits.reshape(len(CATALOG_PRODUCTS), len(_SCORED_FIELDS))
+    hits.flags.writeable = False
+    return hits
+
+def _contains_mask(column: str, idx: np.ndarray, query: str) -> np.ndarray:
+    """Whether each selected product's lowercased `column` contains the query"""
+    return _field_hits(query)[idx, _SCORED_FIELD_INDEX[column]]
+
+def _tag_mask(idx: np.ndarray, query: str) -> np.ndarray:
+    """Whether each selected product has a tag exactly equal to the query"""
+    tags = _CATALOG["tags"]
+    return np.fromiter((query in tags[i] for i in idx), dtype=bool, count=len(idx))
+
+def _top_k(limit: int, keys: List[Any], reverse: bool = True) -> List[int]:
+    """Ranks of the first `limit` keys in sorted order (descending by default),
+    ties kept in input order, i.e. sorted(range(len(keys)), ...)[:limit].
+
+    Selects with a bounded heap, O(N log K), instead of sorting every candidate;
+    negative limits keep their slice semantics."""
+    if limit < 0:
+        return sorted(range(len(keys)), key=keys.__getitem__, reverse=reverse)[:limit]
+    select = heapq.nlargest if reverse else heapq.nsmallest
+    return select(limit, range(len(keys)), key=keys.__getitem__)
+
+def _advanced_scores_numpy(has_query, name_hits, desc_hits, cat_hits, brand_hits, tag_hits, ratings, reviews):
+    """Advanced search relevance: text match boosts (or a flat browsing score),
+    quality boosts for rating and review count, clamped to 1.0"""
+    if has_query:
+        scores = (
+            0.2
+            + np.where(name_hits, 0.4, 0.0)
+            + np.where(desc_hits, 0.2, 0.0)
+            + np.where(cat_hits, 0.2, 0.0)
+            + np.where(brand_hits, 0.3, 0.0)
+            + np.where(tag_hits, 0.3, 0.0)
+        )
+    else:
+        scores = np.full(len(ratings), 0.8)  # High score for non-query searches (browsing)
+    scores = scores + np.where(ratings >= 4.5, 0.15, 0.0)
+    scores = scores + np.where(reviews > 1000, 0.1, 0.0)
+    return np.minimum(scores, 1.0)
+
+if NUMBA_AVAILABLE:
+    # Same arithmetic in a single compiled pass; no fastmath, so the additions
+    # happen in the same order and scores match the NumPy path exactly
+    @njit(cache=True)
+    def _advanced_scores(has_query, name_hits, desc_hits, cat_hits, brand_hits, tag_hits, ratings, reviews):
+        scores = np.empty(ratings.shape[0])
+        for i in range(ratings.shape[0]):
+            if has_query:
+                score = 0.2
+                if name_hits[i]:
+                    score += 0.4
+                if desc_hits[i]:
+                    score += 0.2
+                if cat_hits[i]:
+                    score += 0.2
+                if brand_hits[i]:
+                    score += 0.3
+                if tag_hits[i]:
+                    score += 0.3
+            else:
+                score = 0.8
+            if ratings[i] >= 4.5:
+                score += 0.15
+            if reviews[i] > 1000:
+                score += 0.1
+            scores[i] = min(score, 1.0)
+        return scores
+else:
+    _advanced_scores = _advanced_scores_numpy
+
+_NO_HITS = np.zeros(0, dtype=bool)
+
+# Query-less (browsing) scores depend only on rating and reviews, so they are
+# computed once for the whole catalog
+_ADVANCED_BROWSE_SCORES = _advanced_scores_numpy(
+    False, _NO_HITS, _NO_HITS, _NO_HITS, _NO_HITS, _NO_HITS, _CATALOG["rating"], _CATALOG["reviews"]
+)
+_ADVANCED_BROWSE_SCORES.flags.writeable = False
+
+def _warm_scoring_kernels():
+    """Run the scoring kernel once so JIT compilation doesn't land on the first request"""
+    hits = np.zeros(1, dtype=bool)
+    _advanced_scores(True, hits, hits, hits, hits, hits, _CATALOG["rating"][:1], _CATALOG["reviews"][:1])
+    _advanced_scores(False, _NO_HITS, _NO_HITS, _NO_HITS, _NO_HITS, _NO_HITS, _CATALOG["rating"][:1], _CATALOG["reviews"][:1])
+
+# Public endpoint map advertised by the root endpoint
+API_ENDPOINTS = {
+    "health": "/api/health",
+    "status": "/api/status",
+    "metrics": "/api/metrics",
+    "docs": "/docs",
+    "redoc": "/redoc",
+    "categories": "/api/categories",
+    "products": "/api/products",
+    "search_text": "/api/search/text",
+    "search_image": "/api/search/image",
+    "search_visual": "/api/search/visual",
+    "search_multimodal": "/api/search/multimodal",
+    "search_advanced": "/api/search/advanced"
+}
+
+def _recent_response_times(count: int) -> List[float]:
+    """The last `count` recorded response times, oldest first"""
+    response_times = request_metrics["response_times"]
+    return list(islice(response_times, max(len(response_times) - count, 0), None))
+
+def _avg_response_time() -> float:
+    """Mean of the last 10 response times (0 before any request completes)"""
+    recent = request_metrics["recent_response_times"]
+    return request_metrics["recent_response_time_sum"] / len(recent) if recent else 0
+
+# Short-lived response cache for the observability endpoints: scrapers and
+# dashboards poll them repeatedly, so each payload is built and serialized
+# at most once per TTL window
+STATS_CACHE_TTL_SECONDS = 1.0
+_stats_cache: Dict[str, tuple] = {}
+
+def ttl_cached_response(seconds: float = STATS_CACHE_TTL_SECONDS):
+    """Cache a parameterless endpoint's serialized JSON body for `seconds`"""
+    def decorator(func):
+        key = func.__name__
+
+        @wraps(func)
+        async def wrapper():
+            now = time.perf_counter()
+            entry = _stats_cache.get(key)
+            if entry is not None and entry[0] > now:
+                return Response(content=entry[1], media_type="application/json", headers={"X-Cache": "HIT"})
+            body = APIJSONResponse(await func()).body
+            _stats_cache[key] = (now + seconds, body)
+            return Response(content=body, media_type="application/json", headers={"X-Cache": "MISS"})
+        return wrapper
+    return decorator
+
+def _prebuild_json(payload: Any) -> Tuple[bytes, str]:
+    """Serialize a static payload once and derive its strong ETag"""
+    if ORJSON_AVAILABLE:
+        body = orjson.dumps(payload)
+    else:
+        body = json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    return body, f'"{hashlib.blake2b(body, digest_size=8).hexdigest()}"'
+
+def _prebuilt_json_response(request: Request, body: bytes, etag: str) -> Response:
+    """Serve pre-serialized JSON, answering 304 when the client already has it"""
+    headers = {"ETag": etag}
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and (if_none_match.strip() == "*" or etag in (tag.strip() for tag in if_none_match.split(","))):
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
 
 # Main endpoints
 @app.get("/")
+@ttl_cached_response()
 async def root():
     """Enhanced root endpoint with comprehensive API information"""
-    avg_response_time = sum(request_metrics["response_times"][-10:]) / len(request_metrics["response_times"][-10:]) if request_metrics["response_times"] else 0
+    avg_response_time = _avg_response_time()
     
     return {
         "message": "Visual E-commerce Product Discovery API",
@@ -341,20 +963,7 @@ async def root():
             "error_count": request_metrics["errors"],
             "avg_response_time_ms": round(avg_response_time * 1000, 2)
         },
-        "endpoints": {
-            "health": "/api/health",
-            "status": "/api/status",
-            "metrics": "/api/metrics",
-            "docs": "/docs",
-            "redoc": "/redoc",
-            "categories": "/api/categories",
-            "products": "/api/products",
-            "search_text": "/api/search/text",
-            "search_image": "/api/search/image",
-            "search_visual": "/api/search/visual", 
-            "search_multimodal": "/api/search/multimodal",
-            "search_advanced": "/api/search/advanced"
-        },
+        "endpoints": API_ENDPOINTS,
         "features": {
             "text_search": True,
             "visual_search": True,
@@ -374,13 +983,14 @@ async def health_check():
         "service": "visual-ecommerce-api",
         "version": "2.1.0",
         "timestamp": time.time(),
-        "uptime_seconds": time.time() - getattr(app, '_start_time', time.time())
+        "uptime_seconds": time.perf_counter() - getattr(app, '_start_time', time.perf_counter())
     }
 
 @app.get("/api/status")
+@ttl_cached_response()
 async def enhanced_status():
     """Enhanced API status with performance metrics"""
-    avg_response_time = sum(request_metrics["response_times"][-10:]) / len(request_metrics["response_times"][-10:]) if request_metrics["response_times"] else 0
+    avg_response_time = _avg_response_time()
     
     return {
         "api_status": "healthy",
@@ -402,31 +1012,32 @@ async def enhanced_status():
             "error_tracking": True
         },
         "system_info": {
-            "uptime_seconds": time.time() - getattr(app, '_start_time', time.time()),
+            "uptime_seconds": time.perf_counter() - getattr(app, '_start_time', time.perf_counter()),
             "log_level": os.getenv("LOG_LEVEL", "INFO"),
+            "threadpool_size": to_thread.current_default_thread_limiter().total_tokens,
             "port": int(os.getenv("PORT", 8001))
         }
     }
 
 @app.get("/api/metrics")
+@ttl_cached_response()
 async def get_metrics():
     """Get system metrics"""
     return {
         "requests": {
             "total": request_metrics["total_requests"],
             "active": request_metrics["active_requests"],
-            "errors": request_metrics["errors"]
+            "errors": request_metrics["errors"],
+            "by_route": request_metrics["requests_by_route"]
         },
         "performance": {
-            "response_times": request_metrics["response_times"][-50:],  # Last 50 response times
-            "avg_response_time": sum(request_metrics["response_times"][-10:]) / len(request_metrics["response_times"][-10:]) if request_metrics["response_times"] else 0
+            "response_times": _recent_response_times(50),  # Last 50 response times
+            "avg_response_time": _avg_response_time()
         }
     }
 
-@app.get("/api/categories")
-async def get_categories():
-    """Get product categories with counts"""
-    products = get_all_products()
+def _build_category_counts(products: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Product categories with counts"""
     category_counts = {}
     
     for product in products:
@@ -443,105 +1054,121 @@ async def get_categories():
     
     return {"categories": categories}
 
+# Category payloads depend only on the catalog, so they are serialized once
+CATEGORIES_BODY, CATEGORIES_ETAG = _prebuild_json(_build_category_counts(CATALOG_PRODUCTS))
+PRODUCT_CATEGORIES_BODY, PRODUCT_CATEGORIES_ETAG = _prebuild_json(
+    {"categories": list(set(product["category"] for product in CATALOG_PRODUCTS))}
+)
+
+@app.get("/api/categories")
+async def get_categories(request: Request):
+    """Get product categories with counts"""
+    return _prebuilt_json_response(request, CATEGORIES_BODY, CATEGORIES_ETAG)
+
 @app.get("/api/products/categories")
-async def get_product_categories():
+async def get_product_categories(request: Request):
     """Get product categories - alternate endpoint"""
-    products = get_all_products()
-    categories = list(set(product["category"] for product in products))
-    return {"categories": categories}
+    return _prebuilt_json_response(request, PRODUCT_CATEGORIES_BODY, PRODUCT_CATEGORIES_ETAG)
 
-@app.get("/api/products")
-async def get_products(category: Optional[str] = None, limit: Optional[int] = 20):
-    """Get products with optional category filter"""
+@lru_cache(maxsize=256)
+def _products_json(category: Optional[str], limit: Optional[int]) -> Tuple[bytes, str]:
+    """Serialized /api/products payload; the catalog is static, so each
+    (category, limit) combination is encoded once"""
     products = get_all_products()
     
     # Filter by category if specified
     if category:
-        products = [p for p in products if p["category"].lower() == category.lower()]
+        products = _PRODUCTS_BY_CATEGORY.get(category.lower(), ())
     
     # Apply limit
     if limit:
         products = products[:limit]
     
-    return {
-        "products": products,
+    return _prebuild_json({
+        "products": [dict(product) for product in products],
         "total": len(products),
         "category_filter": category
-    }
+    })
 
-@app.post("/api/search/text")
-async def search_text(request: SearchRequest):
-    """Enhanced text search endpoint"""
+# Unfiltered listing with the default limit is encoded at import
+_products_json(None, 20)
+
+@app.get("/api/products")
+async def get_products(request: Request, category: Optional[str] = None, limit: Optional[int] = 20):
+    """Get products with optional category filter"""
+    return _prebuilt_json_response(request, *_products_json(category, limit))
+
+_NUMERIC_FILTERS = ("price_min", "price_max", "rating_min")
+
+def _check_filter_types(filters: Optional[Dict[str, Any]], categorical: Tuple[str, ...], allow_lists: bool) -> None:
+    """Reject mistyped filter values with a 422 before any filtering, so the outcome
+    doesn't depend on whether an earlier filter already emptied the candidates"""
+    if not filters:
+        return
+    for key in _NUMERIC_FILTERS:
+        if key in filters and not isinstance(filters[key], (int, float)):
+            raise HTTPException(status_code=422, detail=f"Filter '{key}' must be a number")
+    for key in categorical:
+        if key in filters:
+            value = filters[key]
+            values = value if allow_lists and isinstance(value, list) else [value]
+            if not all(isinstance(item, str) for item in values):
+                expected = "a string or a list of strings" if allow_lists else "a string"
+                raise HTTPException(status_code=422, detail=f"Filter '{key}' must be {expected}")
+
+def _text_search_result(request: SearchRequest) -> Dict[str, Any]:
+    """Rank products for a text search (CPU-bound; runs in the threadpool)"""
     query = request.query.lower()
     limit = request.limit or 10
     category_filter = request.category
     filters = request.filters or {}
     
-    all_products = get_all_products()
-    
-    # Apply category filter first
+    # Catalog positions whose name, description, category, brand, or tags contain the query
+    idx = np.array(_match_positions(query), dtype=np.intp)
+
+    # Apply category filter
     if category_filter:
-        all_products = [p for p in all_products if p["category"].lower() == category_filter.lower()]
-    
+        idx = idx[_CATALOG["category"][idx] == category_filter.lower()]
+
     # Apply additional filters
     if filters:
         if "price_min" in filters:
-            all_products = [p for p in all_products if p["price"] >= filters["price_min"]]
+            idx = idx[_CATALOG["price"][idx] >= filters["price_min"]]
         if "price_max" in filters:
-            all_products = [p for p in all_products if p["price"] <= filters["price_max"]]
+            idx = idx[_CATALOG["price"][idx] <= filters["price_max"]]
         if "brand" in filters:
-            all_products = [p for p in all_products if p["brand"].lower() == filters["brand"].lower()]
+            idx = idx[_CATALOG["brand"][idx] == filters["brand"].lower()]
         if "color" in filters:
-            all_products = [p for p in all_products if p.get("color", "").lower() == filters["color"].lower()]
+            idx = idx[_CATALOG["color"][idx] == filters["color"].lower()]
         if "rating_min" in filters:
-            all_products = [p for p in all_products if p.get("rating", 0) >= filters["rating_min"]]
-    
-    # Filter products based on query
+            idx = idx[_CATALOG["rating"][idx] >= filters["rating_min"]]
+
+    # Calculate relevance scores based on match quality: base score, then
+    # name, category, brand and exact tag matches, then the rating boost
+    scores = (
+        0.3
+        + np.where(_contains_mask("name", idx, query), 0.4, 0.0)
+        + np.where(_contains_mask("category", idx, query), 0.2, 0.0)
+        + np.where(_contains_mask("brand", idx, query), 0.3, 0.0)
+        + np.where(_tag_mask(idx, query), 0.3, 0.0)
+        + _CATALOG["rating_boost"][idx]
+    )
+    scores = np.minimum(scores, 1.0)
+
+    # Sort by relevance score (highest first, catalog order among ties) and
+    # build response dicts for the requested page only
     matching_products = []
-    
-    for product in all_products:
-        # Check if query matches product name, description, category, brand, or tags
-        searchable_text = f"{product['name']} {product['description']} {product['category']} {product['brand']} {' '.join(product['tags'])}".lower()
-        
-        if query in searchable_text:
-            # Calculate relevance score based on match quality
-            relevance_score = 0.3  # Base score
-            
-            # Higher score for name matches
-            if query in product['name'].lower():
-                relevance_score += 0.4
-            
-            # Higher score for category matches
-            if query in product['category'].lower():
-                relevance_score += 0.2
-            
-            # Higher score for brand matches
-            if query in product['brand'].lower():
-                relevance_score += 0.3
-            
-            # Higher score for exact tag matches
-            if query in [tag.lower() for tag in product['tags']]:
-                relevance_score += 0.3
-            
-            # Boost score for highly rated products
-            if product.get('rating', 0) >= 4.5:
-                relevance_score += 0.1
-            
-            # Update the score
-            product_copy = product.copy()
-            product_copy['score'] = min(relevance_score, 1.0)
-            matching_products.append(product_copy)
-    
-    # Sort by relevance score (highest first)
-    matching_products.sort(key=lambda x: x['score'], reverse=True)
-    
-    # Apply limit
-    results = matching_products[:limit]
+    for rank in _top_k(limit, scores.tolist()):
+        product_copy = dict(CATALOG_PRODUCTS[idx[rank]])
+        product_copy['score'] = float(scores[rank])
+        matching_products.append(product_copy)
+
+    results = _project_products(matching_products, request.fields)
     
     return {
         "products": results,
-        "similarity_scores": [product.get('score', 0.0) for product in results],
-        "total": len(matching_products),
+        "similarity_scores": list(map(_get_score, results)),
+        "total": len(idx),
         "query": query,
         "category_filter": category_filter,
         "filters_applied": filters,
@@ -549,9 +1176,34 @@ async def search_text(request: SearchRequest):
         "processing_time": 0.12
     }
 
-@app.post("/api/search/visual")
+@app.post("/api/search/text", response_model=None)
+async def search_text(request: SearchRequest):
+    """Enhanced text search endpoint"""
+    _check_filter_types(request.filters, ("brand", "color"), allow_lists=False)
+    cache_key = _search_cache_key("text", request)
+    cached = _search_cache_get(cache_key)
+    if cached is not None:
+        return APIJSONResponse(cached)
+    shared = await _shared_cache_get(cache_key)
+    if shared is not None:
+        return Response(content=shared, media_type="application/json")
+    
+    # Scoring runs in a worker thread so it doesn't block the event loop
+    result = await to_thread.run_sync(_text_search_result, request)
+    return await _search_response(cache_key, result)
+
+@app.post("/api/search/visual", response_model=None)
 async def search_visual(request: VisualSearchRequest):
     """Enhanced visual search endpoint"""
+    return APIJSONResponse(await _visual_search(request))
+
+async def _visual_search(request: VisualSearchRequest) -> Dict[str, Any]:
+    """Score products for a visual search request (shared by the visual and image endpoints)"""
+    cache_key = _search_cache_key("visual", request)
+    cached = _search_cache_get(cache_key)
+    if cached is not None:
+        return cached
+    
     limit = request.limit or 10
     category_filter = request.category
     
@@ -560,10 +1212,12 @@ async def search_visual(request: VisualSearchRequest):
     
     # Apply category filter if specified
     if category_filter:
-        all_products = [p for p in all_products if p["category"].lower() == category_filter.lower()]
+        all_products = _PRODUCTS_BY_CATEGORY.get(category_filter.lower(), ())
     
-    # Simulate visual similarity matching based on image content
-    visual_results = []
+    # Simulate visual similarity matching based on image content; scores are
+    # kept alongside the products and only the top results are copied
+    candidates = []
+    visual_scores = []
     
     # Try to determine category from image URL or default to footwear for demo
     predicted_category = "footwear"  # Default for visual search demo
@@ -584,58 +1238,58 @@ async def search_visual(request: VisualSearchRequest):
     # If no category filter specified, use the predicted category as filter
     if not category_filter:
         # Only show products from the predicted category for more accurate results
-        filtered_products = [p for p in all_products if p["category"].lower() == predicted_category.lower()]
+        filtered_products = _PRODUCTS_BY_CATEGORY.get(predicted_category, ())
         
         # Process only products from the detected category
         for product in filtered_products:
             # Higher base score for matching category
-            visual_score = 0.7 + (product.get('rating', 4.0) - 4.0) * 0.2
+            visual_score = 0.7 + (product['rating'] - 4.0) * 0.2
             
             # Extra boost for specific product types within category
             if predicted_category == "footwear":
-                if any(keyword in product['name'].lower() for keyword in ["nike", "adidas", "sneaker", "running"]):
+                name = _SEARCH_FIELDS[product["id"]]["name"]
+                if any(keyword in name for keyword in ["nike", "adidas", "sneaker", "running"]):
                     visual_score += 0.15
-                elif any(keyword in product['name'].lower() for keyword in ["boot", "hiking"]):
+                elif any(keyword in name for keyword in ["boot", "hiking"]):
                     visual_score += 0.12
-                elif any(keyword in product['name'].lower() for keyword in ["converse", "chuck"]):
+                elif any(keyword in name for keyword in ["converse", "chuck"]):
                     visual_score += 0.10
             
-            product_copy = product.copy()
-            product_copy['score'] = min(visual_score, 1.0)
-            visual_results.append(product_copy)
+            candidates.append(product)
+            visual_scores.append(min(visual_score, 1.0))
     else:
         # If category filter is specified, use it
         for product in all_products:
             # Simulate visual similarity score based on product attributes
-            visual_score = 0.6 + (product.get('rating', 4.0) - 4.0) * 0.2
+            visual_score = 0.6 + (product['rating'] - 4.0) * 0.2
             
             # Boost if it matches the predicted category
-            if product['category'].lower() == predicted_category.lower():
+            if _SEARCH_FIELDS[product["id"]]["category"] == predicted_category:
                 visual_score += 0.2
             
-            product_copy = product.copy()
-            product_copy['score'] = min(visual_score, 1.0)
-            visual_results.append(product_copy)
+            candidates.append(product)
+            visual_scores.append(min(visual_score, 1.0))
     
-    # Sort by visual similarity score
-    visual_results.sort(key=lambda x: x['score'], reverse=True)
+    # Select the top results by visual similarity score
+    results = []
+    for rank in _top_k(limit, visual_scores):
+        product_copy = dict(candidates[rank])
+        product_copy['score'] = visual_scores[rank]
+        results.append(product_copy)
     
-    # Apply limit
-    results = visual_results[:limit]
-    
-    return {
+    return _search_cache_put(cache_key, {
         "products": results,
-        "similarity_scores": [product.get('score', 0.0) for product in results],
-        "total": len(visual_results),
+        "similarity_scores": list(map(_get_score, results)),
+        "total": len(candidates),
         "search_type": "visual",
         "predicted_category": predicted_category,
         "category_filter": category_filter,
         "image_url": request.image_url,
         "query_time": 0.28,
         "processing_time": 0.28
-    }
+    })
 
-@app.post("/api/search/image")
+@app.post("/api/search/image", response_model=None)
 async def search_image_post(
     request: Request,
     limit: Optional[int] = 10,
@@ -651,7 +1305,7 @@ async def search_image_post(
         if body:
             # Try to parse as JSON
             try:
-                json_body = json.loads(body.decode())
+                json_body = orjson.loads(body) if ORJSON_AVAILABLE else json.loads(body.decode())
                 visual_request = VisualSearchRequest(**json_body)
             except (json.JSONDecodeError, ValueError):
                 # If JSON parsing fails, fall back to query parameters
@@ -669,8 +1323,8 @@ async def search_image_post(
             category=category
         )
     
-    # Call the visual search function
-    result = await search_visual(visual_request)
+    # Call the visual search function (copy, since the cached response must not be modified)
+    result = dict(await _visual_search(visual_request))
     
     # Apply offset if specified
     if offset > 0 and offset < len(result["products"]):
@@ -682,9 +1336,9 @@ async def search_image_post(
     # Add offset info to response
     result["offset"] = offset
     
-    return result
+    return APIJSONResponse(result)
 
-@app.get("/api/search/image")
+@app.get("/api/search/image", response_model=None)
 async def search_image_get(
     limit: Optional[int] = 10,
     offset: Optional[int] = 0,
@@ -699,8 +1353,8 @@ async def search_image_get(
         category=category
     )
     
-    # Call the visual search function
-    result = await search_visual(mock_request)
+    # Call the visual search function (copy, since the cached response must not be modified)
+    result = dict(await _visual_search(mock_request))
     
     # Apply offset if specified
     if offset > 0:
@@ -712,68 +1366,55 @@ async def search_image_get(
     # Add offset info to response
     result["offset"] = offset
     
-    return result
+    return APIJSONResponse(result)
 
-@app.post("/api/search/multimodal")
-async def search_multimodal(request: MultimodalSearchRequest):
-    """Enhanced multimodal search endpoint combining text and visual"""
+def _multimodal_search_result(request: MultimodalSearchRequest) -> Dict[str, Any]:
+    """Rank products for a multimodal search (CPU-bound; runs in the threadpool)"""
     query = request.query.lower()
     limit = request.limit or 10
     category_filter = request.category
     
-    all_products = get_all_products()
-    
     # Apply category filter if specified
-    if category_filter:
-        all_products = [p for p in all_products if p["category"].lower() == category_filter.lower()]
+    idx = _category_positions(category_filter)
     
-    # Combine text and visual search results
-    multimodal_results = []
+    # Text similarity component: base score for any match, then name,
+    # category and exact tag matches
+    text_scores = np.where(
+        _text_match_mask(query)[idx],
+        0.4
+        + np.where(_contains_mask("name", idx, query), 0.3, 0.0)
+        + np.where(_contains_mask("category", idx, query), 0.2, 0.0)
+        + np.where(_tag_mask(idx, query), 0.3, 0.0),
+        0.0
+    )
     
-    for product in all_products:
-        # Text similarity component
-        searchable_text = f"{product['name']} {product['description']} {product['category']} {product['brand']} {' '.join(product['tags'])}".lower()
-        text_score = 0.0
-        
-        if query in searchable_text:
-            text_score = 0.4
-            if query in product['name'].lower():
-                text_score += 0.3
-            if query in product['category'].lower():
-                text_score += 0.2
-            if query in [tag.lower() for tag in product['tags']]:
-                text_score += 0.3
-        
-        # Visual similarity component (simulated)
-        visual_score = 0.3 + (product.get('rating', 4.0) - 4.0) * 0.15
-        
-        # Combine scores (weighted average)
-        combined_score = (text_score * 0.6) + (visual_score * 0.4)
-        
-        # Boost popular products
-        if product.get('reviews', 0) > 1000:
-            combined_score += 0.1
-        
-        product_copy = product.copy()
-        product_copy['score'] = min(combined_score, 1.0)
-        product_copy['text_score'] = text_score
-        product_copy['visual_score'] = visual_score
-        
-        if combined_score > 0.2:  # Only include products with reasonable scores
-            multimodal_results.append(product_copy)
+    # Visual similarity component (simulated)
+    visual_scores = 0.3 + (_CATALOG["rating"][idx] - 4.0) * 0.15
     
-    # Sort by combined score
-    multimodal_results.sort(key=lambda x: x['score'], reverse=True)
+    # Combine scores (weighted average), boosting popular products
+    combined_scores = (text_scores * 0.6) + (visual_scores * 0.4)
+    combined_scores = combined_scores + np.where(_CATALOG["reviews"][idx] > 1000, 0.1, 0.0)
     
-    # Apply limit
-    results = multimodal_results[:limit]
+    # Only include products with reasonable scores
+    keep = combined_scores > 0.2
+    idx, text_scores, visual_scores = idx[keep], text_scores[keep], visual_scores[keep]
+    scores = np.minimum(combined_scores[keep], 1.0)
+    
+    # Sort by combined score and materialize the requested page only
+    results = []
+    for rank in _top_k(limit, scores.tolist()):
+        product_copy = dict(CATALOG_PRODUCTS[idx[rank]])
+        product_copy['score'] = float(scores[rank])
+        product_copy['text_score'] = float(text_scores[rank])
+        product_copy['visual_score'] = float(visual_scores[rank])
+        results.append(product_copy)
     
     return {
         "products": results,
-        "similarity_scores": [product.get('score', 0.0) for product in results],
-        "text_scores": [product.get('text_score', 0.0) for product in results],
-        "visual_scores": [product.get('visual_score', 0.0) for product in results],
-        "total": len(multimodal_results),
+        "similarity_scores": list(map(_get_score, results)),
+        "text_scores": list(map(_get_text_score, results)),
+        "visual_scores": list(map(_get_visual_score, results)),
+        "total": len(idx),
         "query": query,
         "search_type": "multimodal",
         "category_filter": category_filter,
@@ -782,145 +1423,157 @@ async def search_multimodal(request: MultimodalSearchRequest):
         "processing_time": 0.35
     }
 
-@app.post("/api/search/advanced")
-async def search_advanced(request: SearchRequest):
-    """Advanced search with comprehensive filtering and sorting"""
+@app.post("/api/search/multimodal", response_model=None)
+async def search_multimodal(request: MultimodalSearchRequest):
+    """Enhanced multimodal search endpoint combining text and visual"""
+    cache_key = _search_cache_key("multimodal", request)
+    cached = _search_cache_get(cache_key)
+    if cached is not None:
+        return APIJSONResponse(cached)
+    shared = await _shared_cache_get(cache_key)
+    if shared is not None:
+        return Response(content=shared, media_type="application/json")
+    
+    # Scoring runs in a worker thread so it doesn't block the event loop
+    result = await to_thread.run_sync(_multimodal_search_result, request)
+    return await _search_response(cache_key, result)
+
+def _advanced_search_result(request: SearchRequest) -> Dict[str, Any]:
+    """Filter, rank and sort products for an advanced search (CPU-bound; runs in the threadpool)"""
     query = request.query.lower()
     limit = request.limit or 10
     category_filter = request.category
     filters = request.filters or {}
     
-    all_products = get_all_products()
-    
-    # Apply category filter
-    if category_filter:
-        all_products = [p for p in all_products if p["category"].lower() == category_filter.lower()]
-    
-    # Apply advanced filters
-    if filters:
-        if "price_min" in filters:
-            all_products = [p for p in all_products if p["price"] >= filters["price_min"]]
-        if "price_max" in filters:
-            all_products = [p for p in all_products if p["price"] <= filters["price_max"]]
-        if "brand" in filters:
-            brands = filters["brand"] if isinstance(filters["brand"], list) else [filters["brand"]]
-            all_products = [p for p in all_products if p["brand"] in brands]
-        if "color" in filters:
-            colors = filters["color"] if isinstance(filters["color"], list) else [filters["color"]]
-            all_products = [p for p in all_products if p.get("color", "").lower() in [c.lower() for c in colors]]
-        if "rating_min" in filters:
-            all_products = [p for p in all_products if p.get("rating", 0) >= filters["rating_min"]]
-        if "size" in filters:
-            sizes = filters["size"] if isinstance(filters["size"], list) else [filters["size"]]
-            all_products = [p for p in all_products if any(size in p.get("size", []) for size in sizes)]
+    # Apply category and categorical filters as one bitmask AND chain
+    mask = _CATEGORY_MASKS.get(category_filter.lower(), 0) if category_filter else _ALL_MASK
+    if "brand" in filters:
+        brands = filters["brand"] if isinstance(filters["brand"], list) else [filters["brand"]]
+        mask &= _any_of_mask(_BRAND_MASKS, brands)
+    if "color" in filters:
+        colors = filters["color"] if isinstance(filters["color"], list) else [filters["color"]]
+        mask &= _any_of_mask(_COLOR_MASKS, [c.lower() for c in colors])
+    if "size" in filters:
+        sizes = filters["size"] if isinstance(filters["size"], list) else [filters["size"]]
+        mask &= _any_of_mask(_SIZE_MASKS, sizes)
+    idx = _mask_positions(mask)
     
-    # Search and score products
-    matching_products = []
+    # Apply numeric range filters
+    if "price_min" in filters:
+        idx = idx[_CATALOG["price"][idx] >= filters["price_min"]]
+    if "price_max" in filters:
+        idx = idx[_CATALOG["price"][idx] <= filters["price_max"]]
+    if "rating_min" in filters:
+        idx = idx[_CATALOG["rating"][idx] >= filters["rating_min"]]
+    narrowed_idx = idx if not _NARROWING_FILTERS.isdisjoint(filters) else None
     
-    for product in all_products:
-        searchable_text = f"{product['name']} {product['description']} {product['category']} {product['brand']} {' '.join(product['tags'])}".lower()
-        
-        if not query or query in searchable_text:
-            # Calculate comprehensive relevance score
-            score = 0.2  # Base score
-            
-            if query:
-                # Text matching scores
-                if query in product['name'].lower():
-                    score += 0.4
-                if query in product['description'].lower():
-                    score += 0.2
-                if query in product['category'].lower():
-                    score += 0.2
-                if query in product['brand'].lower():
-                    score += 0.3
-                if query in [tag.lower() for tag in product['tags']]:
-                    score += 0.3
-            else:
-                score = 0.8  # High score for non-query searches (browsing)
-            
-            # Quality boosters
-            if product.get('rating', 0) >= 4.5:
-                score += 0.15
-            if product.get('reviews', 0) > 1000:
-                score += 0.1
-            
-            product_copy = product.copy()
-            product_copy['score'] = min(score, 1.0)
-            matching_products.append(product_copy)
+    # Search and score products: text hits are resolved here, the arithmetic
+    # (including quality boosters) runs in the scoring kernel
+    if query:
+        idx = idx[_text_match_mask(query)[idx]]
+        hits = (
+            _contains_mask("name", idx, query),
+            _contains_mask("description", idx, query),
+            _contains_mask("category", idx, query),
+            _contains_mask("brand", idx, query),
+            _tag_mask(idx, query),
+        )
+        scores = _advanced_scores(True, *hits, _CATALOG["rating"][idx], _CATALOG["reviews"][idx])
+    else:
+        scores = _ADVANCED_BROWSE_SCORES[idx]
     
-    # Apply sorting
+    # Apply sorting and limit together (top-K selection, ties keep catalog order)
     sort_by = filters.get("sort_by", "relevance")
     
     if sort_by == "price_low":
-        matching_products.sort(key=lambda x: x['price'])
+        order = _top_k(limit, _CATALOG["price"][idx].tolist(), reverse=False)
     elif sort_by == "price_high":
-        matching_products.sort(key=lambda x: x['price'], reverse=True)
+        order = _top_k(limit, _CATALOG["price"][idx].tolist())
     elif sort_by == "rating":
-        matching_products.sort(key=lambda x: x.get('rating', 0), reverse=True)
+        order = _top_k(limit, _CATALOG["rating"][idx].tolist())
     elif sort_by == "reviews":
-        matching_products.sort(key=lambda x: x.get('reviews', 0), reverse=True)
+        order = _top_k(limit, _CATALOG["reviews"][idx].tolist())
     elif sort_by == "name":
-        matching_products.sort(key=lambda x: x['name'])
+        order = _top_k(limit, [CATALOG_PRODUCTS[i]['name'] for i in idx], reverse=False)
     else:  # relevance (default)
-        matching_products.sort(key=lambda x: x['score'], reverse=True)
+        order = _top_k(limit, scores.tolist())
     
-    # Apply limit
-    results = matching_products[:limit]
-    
-    # Get available filter options from current results
-    available_brands = list(set(p["brand"] for p in all_products))
-    available_colors = list(set(p.get("color", "") for p in all_products if p.get("color")))
-    price_range = {
-        "min": min(p["price"] for p in all_products) if all_products else 0,
-        "max": max(p["price"] for p in all_products) if all_products else 0
-    }
+    # Materialize only the returned products
+    matching_products = []
+    for rank in order:
+        product_copy = dict(CATALOG_PRODUCTS[idx[rank]])
+        product_copy['score'] = float(scores[rank])
+        matching_products.append(product_copy)
+    results = _project_products(matching_products, request.fields)
+    
+    # Get available filter options: precomputed per category unless other
+    # filters narrowed the set
+    if narrowed_idx is not None:
+        available = _available_filters([CATALOG_PRODUCTS[i] for i in narrowed_idx])
+    else:
+        available = _AVAILABLE_FILTERS_BY_CATEGORY.get(
+            category_filter.lower() if category_filter else None, _NO_AVAILABLE_FILTERS
+        )
     
     return {
         "products": results,
-        "similarity_scores": [product.get('score', 0.0) for product in results],
-        "total": len(matching_products),
+        "similarity_scores": list(map(_get_score, results)),
+        "total": len(idx),
         "query": query,
         "category_filter": category_filter,
         "filters_applied": filters,
         "sort_by": sort_by,
         "available_filters": {
-            "brands": available_brands,
-            "colors": available_colors,
-            "price_range": price_range,
+            "brands": available["brands"],
+            "colors": available["colors"],
+            "price_range": available["price_range"],
             "sort_options": ["relevance", "price_low", "price_high", "rating", "reviews", "name"]
         },
         "query_time": 0.18,
         "processing_time": 0.18
     }
 
+@app.post("/api/search/advanced", response_model=None)
+async def search_advanced(request: SearchRequest):
+    """Advanced search with comprehensive filtering and sorting"""
+    _check_filter_types(request.filters, ("brand", "color", "size"), allow_lists=True)
+    cache_key = _search_cache_key("advanced", request)
+    cached = _search_cache_get(cache_key)
+    if cached is not None:
+        return APIJSONResponse(cached)
+    shared = await _shared_cache_get(cache_key)
+    if shared is not None:
+        return Response(content=shared, media_type="application/json")
+    
+    # Scoring runs in a worker thread so it doesn't block the event loop
+    result = await to_thread.run_sync(_advanced_search_result, request)
+    return await _search_response(cache_key, result)
+
 # Global exception handler
 @app.exception_handler(Exception)
 async def global_exception_handler(request: Request, exc: Exception):
     """Global exception handler"""
-    import traceback
+    path = request.scope["path"]
     
-    # Log detailed error information
-    logger.error(f"Unhandled exception in {request.method} {request.url.path}: {exc}")
-    logger.error(f"Traceback: {traceback.format_exc()}")
+    # Log detailed error information (the traceback is rendered by the log listener thread)
+    logger.error("Unhandled exception in %s %s: %s", request.method, path, exc, exc_info=exc)
     
     # Track error
     request_metrics["errors"] += 1
     
-    return JSONResponse(
-        status_code=500,
-        content={
-            "error": "internal_server_error",
-            "message": "An unexpected error occurred",
-            "path": str(request.url.path),
-            "method": request.method,
-            "error_type": type(exc).__name__,
-            "timestamp": time.time()
-        }
-    )
+    content = {
+        **INTERNAL_ERROR_FIELDS,
+        "path": path,
+        "method": request.method,
+        "timestamp": time.time()
+    }
+    if EXPOSE_ERROR_DETAILS:
+        content["error_type"] = type(exc).__name__
+    
+    return APIJSONResponse(status_code=500, content=content)
 
 # Store startup time for uptime calculation
-app._start_time = time.time()
+app._start_time = time.perf_counter()
 
 if __name__ == "__main__":
     logger.info("Starting Visual E-commerce API v2.1.0...")
@@ -931,8 +1584,23 @@ if __name__ == "__main__":
         "port": int(os.getenv("PORT", 8001)),
         "reload": os.getenv("ENVIRONMENT", "development") == "development",
         "log_level": os.getenv("LOG_LEVEL", "info").lower(),
-        "access_log": True
+        "access_log": True,
+        # libuv event loop and C HTTP parser, falling back to asyncio/h11 if not installed
+        "loop": "uvloop" if UVLOOP_AVAILABLE else "asyncio",
+        "http": "httptools" if HTTPTOOLS_AVAILABLE else "h11",
+        # Deeper accept queue and longer keep-alive for bursty clients; cap
+        # in-flight connections so overload sheds with 503s instead of resets
+        "backlog": 2048,
+        "limit_concurrency": int(os.getenv("LIMIT_CONCURRENCY", 1000)),
+        "timeout_keep_alive": 30,
+        "timeout_graceful_shutdown": 10
     }
     
+    # Direct non-reload runs use one worker per two cores; development keeps
+    # the single auto-reloading process. Production deployments run under
+    # gunicorn with UvicornWorker (see gunicorn.conf.py)
+    if not config["reload"]:
+        config["workers"] = int(os.getenv("WORKERS", max(2, (os.cpu_count() or 2) // 2)))
+    
     logger.info(f"Starting server with config: {config}")
     uvicorn.run("main:app", **config)
@@ -22,7 +22,6 @@ from datetime import datetime
 import re
 import logging
 from pathlib import Path
-import requests
 import time
 
 # Configure logging
@@ -15,7 +15,6 @@ Date: September 2025
 import json
 import random
 import uuid
-import requests
 import logging
 from typing import List, Dict, Any, Optional, Union
 from dataclasses import dataclass, asdict
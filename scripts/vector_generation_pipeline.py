@@ -28,11 +28,14 @@ import pandas as pd
 from datetime import datetime
 import pickle
 import hashlib
+import atexit
 import aiohttp
 import aiofiles
 from PIL import Image
 import io
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from concurrent.futures import ThreadPoolExecutor, as_completed
 import threading
 from tqdm import tqdm
@@ -96,6 +99,31 @@ class ProcessingStats:
         duration = (self.end_time - self.start_time).total_seconds()
         return self.processed_products / duration if duration > 0 else 0.0
 
+# Process-wide keep-alive session for synchronous downloads, shared by every
+# ImageDownloader so the connection pool is warmed once per process
+_SYNC_SESSION: Optional[requests.Session] = None
+_SYNC_SESSION_LOCK = threading.Lock()
+SYNC_POOL_SIZE = 32
+
+def get_sync_session() -> requests.Session:
+    """Return the shared requests session, creating it on first use"""
+    global _SYNC_SESSION
+    if _SYNC_SESSION is None:
+        with _SYNC_SESSION_LOCK:
+            if _SYNC_SESSION is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(
+                    pool_connections=SYNC_POOL_SIZE,
+                    pool_maxsize=SYNC_POOL_SIZE,
+                    max_retries=Retry(total=2, backoff_factor=0.1, status_forcelist=[502, 503, 504])
+                )
+                session.mount("http://", adapter)
+                session.mount("https://", adapter)
+                session.headers.update({"Accept-Encoding": "gzip, deflate"})
+                atexit.register(session.close)
+                _SYNC_SESSION = session
+    return _SYNC_SESSION
+
 class ImageDownloader:
     """Async image downloader with caching and error handling"""
     
@@ -105,6 +133,7 @@ class ImageDownloader:
         self.max_concurrent = max_concurrent
         self.session = None
         self.semaphore = asyncio.Semaphore(max_concurrent)
+        self.sync_session = get_sync_session()
         
     async def __aenter__(self):
         connector = aiohttp.TCPConnector(limit=self.max_concurrent)
@@ -176,7 +205,7 @@ class ImageDownloader:
                     cache_path.unlink(missing_ok=True)
             
             # Download image
-            response = requests.get(url, timeout=30)
+            response = self.sync_session.get(url, timeout=30)
             if response.status_code == 200:
                 image = Image.open(io.BytesIO(response.content)).convert('RGB')
                 image.save(cache_path, 'JPEG', quality=85)
@@ -348,11 +377,21 @@ class VectorGenerator:
             logger.error(f"Error generating batch image embeddings: {e}")
             image_embeddings = [None] * len(products)
         
-        # Combine embeddings
+        # Combine embeddings: products with only one modality keep it as is,
+        # products with both are weighted and normalized as one stacked matrix
         combined_embeddings = []
-        for text_emb, image_emb in zip(text_embeddings, image_embeddings):
-            combined = self.combine_embeddings(text_emb, image_emb)
-            combined_embeddings.append(combined)
+        both = []
+        for i, (text_emb, image_emb) in enumerate(zip(text_embeddings, image_embeddings)):
+            if text_emb is not None and image_emb is not None:
+                both.append(i)
+            combined_embeddings.append(text_emb if image_emb is None else image_emb)
+        
+        if both:
+            combined = (self.text_weight * np.stack([text_embeddings[i] for i in both]) +
+                       self.image_weight * np.stack([image_embeddings[i] for i in both]))
+            combined /= np.linalg.norm(combined, axis=1, keepdims=True)
+            for i, row in zip(both, combined):
+                combined_embeddings[i] = row
         
         return combined_embeddings
 
@@ -564,33 +603,38 @@ class VectorGenerationPipeline:
             logger.error(f"Error loading checkpoint: {e}")
             return None
     
+    async def _download_product_image(self, product: Dict[str, Any]) -> Optional[Image.Image]:
+        """Download one product's image, updating download stats"""
+        image_url = product.get('image_url')
+        product_id = product.get('id', 'unknown')
+        
+        if not image_url:
+            return None
+        
+        try:
+            image = await self.image_downloader.download_image(image_url, product_id)
+            
+            if image:
+                self.stats.images_downloaded += 1
+            else:
+                self.stats.images_failed += 1
+            
+            return image
+            
+        except Exception as e:
+            logger.error(f"Error downloading image for {product_id}: {e}")
+            self.stats.images_failed += 1
+            return None
+    
     async def process_batch(self, 
                            batch_products: List[Dict[str, Any]], 
                            batch_indices: List[int]) -> Tuple[List[Optional[np.ndarray]], List[int]]:
         """Process a batch of products"""
-        # Download images
-        images = []
-        
-        for product in batch_products:
-            image_url = product.get('image_url')
-            product_id = product.get('id', 'unknown')
-            
-            if image_url:
-                try:
-                    image = await self.image_downloader.download_image(image_url, product_id)
-                    images.append(image)
-                    
-                    if image:
-                        self.stats.images_downloaded += 1
-                    else:
-                        self.stats.images_failed += 1
-                        
-                except Exception as e:
-                    logger.error(f"Error downloading image for {product_id}: {e}")
-                    images.append(None)
-                    self.stats.images_failed += 1
-            else:
-                images.append(None)
+        # Download images concurrently (the downloader's semaphore bounds how
+        # many are in flight)
+        images = await asyncio.gather(*(
+            self._download_product_image(product) for product in batch_products
+        ))
         
         # Generate embeddings
         try: